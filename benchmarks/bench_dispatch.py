@@ -0,0 +1,61 @@
+"""Command dispatch benchmark: parse and dispatch throughput of CommandParser.
+
+The player does nothing, so only splitting and dispatching is measured,
+with and without recording command statistics.
+
+Run from the repository root:
+    python -m benchmarks.bench_dispatch --commands 2000000
+"""
+
+import argparse
+import itertools
+import time
+
+from src.command_parser import CommandParser
+from src.video_output import NullSink
+from src.video_stats import Stats
+
+COMMAND_LINES = (
+    "NUMBER_OF_VIDEOS", "SHOW_ALL_VIDEOS", "PLAY amazing_cats_video_id", "PLAY_RANDOM",
+    "STOP", "PAUSE", "CONTINUE", "SHOW_PLAYING", "CREATE_PLAYLIST my_playlist",
+    "ADD_TO_PLAYLIST my_playlist amazing_cats_video_id",
+    "REMOVE_FROM_PLAYLIST my_playlist amazing_cats_video_id", "CLEAR_PLAYLIST my_playlist",
+    "DELETE_PLAYLIST my_playlist", "SHOW_PLAYLIST my_playlist", "SHOW_ALL_PLAYLISTS",
+    "SEARCH_VIDEOS cat", "SEARCH_VIDEOS_WITH_TAG #cat", "FLAG_VIDEO amazing_cats_video_id",
+    "ALLOW_VIDEO amazing_cats_video_id",
+)
+
+
+class NullPlayer:
+    """Accepts every VideoPlayer call and does nothing."""
+
+    output = NullSink()
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commands", type=int, default=2 * 10 ** 6)
+    args = parser.parse_args()
+    command_parser = CommandParser(NullPlayer())
+    lines = list(itertools.islice(itertools.cycle(COMMAND_LINES), args.commands))
+    for label, parser in (("without stats", command_parser),
+                          ("with stats", CommandParser(NullPlayer(), Stats()))):
+        start = time.perf_counter()
+        for line in lines:
+            parser.execute_command(line.split())
+        elapsed = time.perf_counter() - start
+        print(f"{label:>13}: {args.commands:,} commands in {elapsed:.2f}s: "
+              f"{args.commands / elapsed:,.0f} commands/s, "
+              f"{elapsed / args.commands * 1e9:,.0f}ns/command")
+    for line in ("NUMBER_OF_VIDEOS", "ALLOW_VIDEO amazing_cats_video_id"):
+        start = time.perf_counter()
+        for _ in range(10 ** 5):
+            command_parser.execute_command(line.split())
+        print(f"{line.split()[0]:>16}: {(time.perf_counter() - start) * 1e4:,.0f}ns/command")
+
+
+if __name__ == "__main__":
+    main()
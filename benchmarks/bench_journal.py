@@ -0,0 +1,79 @@
+"""Journal benchmark: journaling and recovering 10^6 playlist and flag changes.
+
+Recovery is timed twice: from a journal that was never compacted, which
+replays every change, and from one compacted every --compact-every
+changes, which replays at most that many on top of a snapshot.
+
+Run from the repository root:
+    python -m benchmarks.bench_journal --operations 1000000
+"""
+
+import argparse
+import itertools
+import os
+import tempfile
+import time
+
+from src.video_journal import Journal
+from src.video_output import NullSink
+from src.video_player import VideoPlayer
+
+VIDEO_IDS = ("amazing_cats_video_id", "funny_dogs_video_id", "another_cat_video_id",
+             "life_at_google_video_id", "nothing_video_id")
+
+
+def operations(player, count):
+    """Issues count journaled changes: playlist edits and flag changes."""
+    issued = 0
+    for i in itertools.count():
+        name = f"playlist_{i % 1000}"
+        steps = [lambda: player.create_playlist(name)]
+        steps += [lambda video_id=video_id: player.add_to_playlist(name, video_id)
+                  for video_id in VIDEO_IDS]
+        steps += [lambda: player.remove_from_playlist(name, VIDEO_IDS[0]),
+                  lambda: player.flag_video(VIDEO_IDS[i % 5], "spam"),
+                  lambda: player.allow_video(VIDEO_IDS[i % 5]),
+                  lambda: player.clear_playlist(name),
+                  lambda: player.delete_playlist(name)]
+        for step in steps:
+            step()
+            issued += 1
+            if issued == count:
+                return
+
+
+def bench(path, count, compact_every):
+    journal = Journal(path, compact_every)
+    player = VideoPlayer(output=NullSink(), journal=journal)
+    start = time.perf_counter()
+    operations(player, count)
+    issued = time.perf_counter() - start
+    journal.close()
+    written = time.perf_counter() - start
+
+    start = time.perf_counter()
+    journal = Journal(path, compact_every)
+    VideoPlayer(output=NullSink(), journal=journal)
+    recovered = time.perf_counter() - start
+    journal.close()
+    size = os.path.getsize(path)
+    return issued, written, recovered, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=10 ** 6)
+    parser.add_argument("--compact-every", type=int, default=10 ** 5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, compact_every in (("never compacted", args.operations + 1),
+                                     (f"compacted every {args.compact_every}", args.compact_every)):
+            issued, written, recovered, size = bench(
+                os.path.join(tmp, label.replace(" ", "_")), args.operations, compact_every)
+            print(f"{label}: {args.operations / issued:,.0f} changes/s issued, "
+                  f"all synced after {written:.2f}s, journal {size / 2 ** 20:.1f} MiB, "
+                  f"recovery {recovered:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Memory benchmark: columnar VideoStore against one Video object per video.
+
+Video objects are measured twice: with the __slots__ Video has today, and
+as they were before VideoStore, with a __dict__ per video.
+
+Run from the repository root:
+    python -m benchmarks.bench_memory --rows 1000000
+"""
+
+import argparse
+import io
+import tracemalloc
+
+from src.video import Video
+from src.video_catalog import iter_catalog_rows
+from src.video_store import VideoStore
+from .synthetic import generate_catalog
+
+
+def measure(build, rows):
+    tracemalloc.start()
+    kept = build(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+class DictVideo:
+    """Video as it was before VideoStore: the same attributes, kept in a __dict__."""
+
+    def __init__(self, video_title, video_id, video_tags, flagged, flag_reason):
+        self._title = video_title
+        self._video_id = video_id
+        self._tags = tuple(video_tags)
+        self._flagged = flagged
+        self._flag_reason = flag_reason
+
+
+def objects_builder(video_class):
+    """Returns a build function keeping one video_class object per video in a dict."""
+    def build_objects(rows):
+        videos = {}
+        for title, video_id, tags in rows:
+            videos[video_id] = video_class(title, video_id, tags, False, "")
+        return videos
+    return build_objects
+
+
+def build_store(rows):
+    store = VideoStore()
+    for title, video_id, tags in rows:
+        store.add(title, video_id, tags)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10 ** 5)
+    args = parser.parse_args()
+    catalog = "".join(generate_catalog(args.rows))
+    for name, build in (("dict of Video (__dict__)", objects_builder(DictVideo)),
+                        ("dict of Video (__slots__)", objects_builder(Video)),
+                        ("VideoStore", build_store)):
+        # rows are parsed while tracing, so everything a layout keeps alive
+        # (including the strings it holds on to) is counted
+        size = measure(build, iter_catalog_rows(io.StringIO(catalog)))
+        print(f"{name:>25}: {size / 2 ** 20:8.1f} MiB  {size / args.rows:6.1f} bytes/video")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Playlist benchmark: add, membership and removal on large playlists.
+
+Compares Playlist against the plain list of video ids it used to keep. Each
+operation is timed on a playlist that already holds --size videos.
+
+Run from the repository root:
+    python -m benchmarks.bench_playlist --size 100000
+"""
+
+import argparse
+import random
+import time
+
+from src.video_playlist import Playlist
+
+
+class ListPlaylist:
+    """The list based playlist, kept for comparison."""
+
+    def __init__(self, video_ids):
+        self.videos = list(video_ids)
+
+    def __contains__(self, video_id):
+        return video_id in self.videos
+
+    def add_video(self, video_id):
+        self.videos.append(video_id)
+
+    def remove_video(self, video_id):
+        self.videos.remove(video_id)
+
+
+def filled_playlist(video_ids):
+    playlist = Playlist("bench")
+    for video_id in video_ids:
+        playlist.add_video(video_id)
+    return playlist
+
+
+def time_per_operation(operation, video_ids):
+    start = time.perf_counter()
+    for video_id in video_ids:
+        operation(video_id)
+    return (time.perf_counter() - start) / len(video_ids)
+
+
+def bench(playlist, new_ids, present_ids):
+    def add(video_id):
+        # the duplicate check add_to_playlist performs before adding
+        if video_id not in playlist:
+            playlist.add_video(video_id)
+
+    return {
+        "add": time_per_operation(add, new_ids),
+        "contains": time_per_operation(playlist.__contains__, present_ids),
+        "remove": time_per_operation(playlist.remove_video, present_ids),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10 ** 5)
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+    ids = [f"video_{i:08d}" for i in range(args.size)]
+    new_ids = [f"new_video_{i:08d}" for i in range(args.operations)]
+    present_ids = random.Random(0).sample(ids, args.operations)
+    for name, playlist in (("Playlist", filled_playlist(ids)), ("list", ListPlaylist(ids))):
+        timings = bench(playlist, new_ids, present_ids)
+        print(f"{name:>8} size={args.size}: " + " ".join(
+            f"{operation}={seconds * 1e9:,.0f}ns" for operation, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Title search benchmark: the trigram and word indexes against a linear scan.
+
+Searches of three or more characters go through the trigram index, shorter
+ones through the word index (TitleIndex). The "library" column times
+search_titles and "path" names the index it went through; the "word"
+column times the word index alone, for queries that would otherwise take
+the trigram path. The scan uppercases and checks every title. Cells that do
+not apply print as "-".
+
+Run from the repository root:
+    python -m benchmarks.bench_search --max-exponent 6
+"""
+
+import argparse
+import io
+import time
+
+from src.video_library import VideoLibrary
+from .synthetic import generate_catalog
+
+
+def linear_scan(library, term):
+    return [video for video in library.get_all_videos()
+            if not video.flagged and video.title.upper().find(term.upper()) != -1]
+
+
+def word_index_search(library, term):
+    """A title search narrowed down by the word index only."""
+    needle = term.casefold()
+    store = library.catalog.store
+    return [ordinal for ordinal in sorted(library.catalog.title_index().candidates(term))
+            if needle in store.title(ordinal).casefold()]
+
+
+def time_query(search, library, term, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search(library, term)
+    return (time.perf_counter() - start) / repeat
+
+
+def cell(seconds, scale, unit):
+    """Formats a timing, or "-" when there is none."""
+    if seconds is None:
+        return f"{'-':>10}"
+    return f"{seconds * scale:>8.1f}{unit}"
+
+
+def time_build(build):
+    start = time.perf_counter()
+    build()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-exponent", type=int, default=3)
+    parser.add_argument("--max-exponent", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    print(f"{'videos':>10} {'query':>16} {'results':>8} {'path':>8} {'library':>10} {'word':>10} "
+          f"{'scan':>10}")
+    for exponent in range(args.min_exponent, args.max_exponent + 1):
+        rows = 10 ** exponent
+        library = VideoLibrary(io.StringIO("".join(generate_catalog(rows))))
+        trigram_build = time_build(library.catalog.trigram_index)
+        word_build = time_build(library.catalog.title_index)
+        # the library column holds the trigram index build here
+        print(f"{rows:>10} {'(index build)':>16} {'':>8} {'':>8} "
+              f"{cell(trigram_build, 1e3, 'ms')} {cell(word_build, 1e3, 'ms')}")
+        # a title's own number only matches that title; "g ca" spans two words
+        for term in (f" {rows // 2} ", "amazing cat", "g ca", "ca"):
+            matches = len(library.search_titles(term))
+            indexed = time_query(VideoLibrary.search_titles, library, term, args.repeat)
+            path = "trigram" if len(term) >= 3 else "word"
+            word = time_query(word_index_search, library, term, args.repeat) \
+                if path == "trigram" else None
+            scan = time_query(linear_scan, library, term, 1) if rows <= 10 ** 6 else None
+            print(f"{rows:>10} {term!r:>16} {matches:>8} {path:>8} {cell(indexed, 1e6, 'us')} "
+                  f"{cell(word, 1e6, 'us')} {cell(scan, 1e3, 'ms')}")
+
+
+if __name__ == "__main__":
+    main()
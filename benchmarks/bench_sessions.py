@@ -0,0 +1,51 @@
+"""Session benchmark: the cost of a new player over an already loaded catalog.
+
+Every player reads from the catalog shared by the process and keeps only
+its own flags, so creating one should take microseconds and a few hundred
+bytes whatever the size of the catalog.
+
+Run from the repository root:
+    python -m benchmarks.bench_sessions --rows 1000000 --sessions 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.video_library import VideoLibrary
+from src.video_output import NullSink
+from src.video_player import VideoPlayer
+from .synthetic import write_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10 ** 6)
+    parser.add_argument("--sessions", type=int, default=10000)
+    args = parser.parse_args()
+    output = NullSink()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "videos.txt"), args.rows)
+        start = time.perf_counter()
+        VideoLibrary(path, snapshot=True, output=output)
+        print(f"first session (loads the catalog): {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        players = [VideoPlayer(VideoLibrary(path, snapshot=True, output=output), output)
+                   for _ in range(args.sessions)]
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        more = [VideoPlayer(VideoLibrary(path, snapshot=True, output=output), output)
+                for _ in range(args.sessions)]
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        print(f"{args.sessions} more sessions: {elapsed / args.sessions * 1e6:.1f}us "
+              f"and {size / len(more):,.0f} bytes per session")
+
+
+if __name__ == "__main__":
+    main()
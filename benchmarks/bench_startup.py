@@ -0,0 +1,54 @@
+"""Startup benchmark: loading large synthetic catalogs into a VideoLibrary.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --rows 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src.video_library import VideoLibrary
+from .synthetic import write_catalog
+
+
+def bench(path, chunk_size):
+    start = time.perf_counter()
+    library = VideoLibrary(None)
+    loader = library.ingest(path, chunk_size)
+    next(loader)
+    first_chunk = time.perf_counter() - start
+    for _ in loader:
+        pass
+    total = time.perf_counter() - start
+    return first_chunk, total, len(library)
+
+
+def bench_snapshot(path):
+    start = time.perf_counter()
+    VideoLibrary(path, snapshot=True, shared=False)
+    compile_and_open = time.perf_counter() - start
+    start = time.perf_counter()
+    library = VideoLibrary(path, snapshot=True, shared=False)
+    library.get_video("video_00000000")
+    return compile_and_open, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10 ** 6)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "videos.txt"), args.rows)
+        first_chunk, total, count = bench(path, args.chunk_size)
+        compile_and_open, open_only = bench_snapshot(path)
+    print(f"rows={count} first_chunk={first_chunk * 1000:.2f}ms "
+          f"full_load={total:.2f}s ({count / total:,.0f} videos/s)")
+    print(f"snapshot: compile+open={compile_and_open:.2f}s "
+          f"open+first_lookup={open_only * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
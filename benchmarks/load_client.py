@@ -0,0 +1,97 @@
+"""Load test client for the line protocol server.
+
+Opens many concurrent sessions, each pipelining a stream of commands, and
+reports throughput and latency percentiles. Without --port, a server is
+started in this process on a free port.
+
+Run from the repository root:
+    python -m benchmarks.load_client --sessions 2000 --commands 50
+"""
+
+import argparse
+import asyncio
+import collections
+import itertools
+import time
+
+from src.server import VideoServer
+
+COMMANDS = (
+    "NUMBER_OF_VIDEOS", "PLAY amazing_cats_video_id", "SHOW_PLAYING", "PAUSE", "CONTINUE",
+    "CREATE_PLAYLIST my_playlist", "ADD_TO_PLAYLIST my_playlist funny_dogs_video_id",
+    "SHOW_PLAYLIST my_playlist", "SEARCH_VIDEOS_WITH_TAG #cat", "SHOW_ALL_VIDEOS",
+    "REMOVE_FROM_PLAYLIST my_playlist funny_dogs_video_id", "DELETE_PLAYLIST my_playlist",
+    "FLAG_VIDEO nothing_video_id", "ALLOW_VIDEO nothing_video_id", "STOP",
+)
+
+
+async def run_session(host, port, commands, pipeline, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = collections.deque()  # send times of the commands awaiting a response
+    lines = itertools.islice(itertools.cycle(COMMANDS), commands)
+    pending = commands
+
+    def send(count):
+        for line in itertools.islice(lines, count):
+            sent.append(time.perf_counter())
+            writer.write(line.encode() + b"\n")
+
+    send(pipeline)
+    while pending:
+        while (await reader.readline()) != b".\n":
+            pass
+        latencies.append(time.perf_counter() - sent.popleft())
+        pending -= 1
+        send(1)
+        await writer.drain()
+    writer.write(b"EXIT\n")
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--commands", type=int, default=50, help="commands per session")
+    parser.add_argument("--pipeline", type=int, default=4,
+                        help="commands each session keeps in flight")
+    args = parser.parse_args()
+
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+    server = None
+    port = args.port
+    if port is None:
+        server = await VideoServer().start(args.host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(args.host, port, args.commands, args.pipeline, latencies)
+                           for _ in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    print(f"{args.sessions} sessions x {args.commands} commands in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:,.0f} commands/s")
+    print("latency " + " ".join(f"p{int(fraction * 100)}={percentile(latencies, fraction) * 1e3:.2f}ms"
+                                for fraction in (0.5, 0.95, 0.99)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
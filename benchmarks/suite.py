@@ -0,0 +1,157 @@
+"""Benchmark suite: library loading and every command, at growing catalog sizes.
+
+For every size, a deterministic synthetic catalog is written and loaded by
+parsing and through a snapshot, and its indexes are built. Playlists are
+then created and a command trace covering every registered command is
+executed. The mean time of each command is recorded.
+
+Results are written as JSON. Given a baseline file from an earlier run,
+every timing is compared with it and the run fails if one got slower than
+the allowed ratio.
+
+Run from the repository root:
+    python -m benchmarks.suite --exponents 3 4 5 --output results.json
+    python -m benchmarks.suite --exponents 3 4 5 --baseline results.json
+"""
+
+import argparse
+import collections
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from src.command_parser import CommandException, CommandParser
+from src.video_library import VideoLibrary
+from src.video_output import NullSink
+from src.video_player import VideoPlayer
+from .synthetic import generate_playlists, generate_trace, write_catalog
+
+# slowdowns smaller than this many seconds are too noisy to call a regression
+NOISE_FLOOR = 5e-6
+
+
+def time_call(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+
+def bench_size(rows, directory, trace_length, playlists, seed):
+    """Returns the timings, in seconds, for a catalog of rows videos."""
+    path = write_catalog(os.path.join(directory, f"videos_{rows}.txt"), rows, seed)
+    load = {}
+    load["parse"], library = time_call(lambda: VideoLibrary(path, shared=False))
+    snapshot = os.path.join(directory, f"videos_{rows}.snap")
+    load["snapshot_compile_and_open"], _ = time_call(
+        lambda: VideoLibrary(path, snapshot=snapshot, shared=False))
+    load["snapshot_open"], _ = time_call(lambda: VideoLibrary(path, snapshot=snapshot, shared=False))
+
+    # indexes are built on first use; build them here so that command timings
+    # are steady state and the build times are recorded on their own
+    catalog = library.catalog
+    for name, build in (("title_index", catalog.title_index), ("trigram_index", catalog.trigram_index),
+                        ("tag_index", catalog.tag_index), ("prefix_index", catalog.prefix_index),
+                        ("listing", catalog.listing)):
+        load[name], _ = time_call(build)
+
+    output = NullSink()
+    library.output = output
+    parser = CommandParser(VideoPlayer(library, output, interactive=False))
+    for name, video_ids in generate_playlists(rows, playlists, 20, seed):
+        parser.execute_command(["CREATE_PLAYLIST", name])
+        for video_id in video_ids:
+            parser.execute_command(["ADD_TO_PLAYLIST", name, video_id])
+
+    totals = collections.Counter()
+    counts = collections.Counter()
+    commands = [name for name in CommandParser._commands if name != "HELP"] + ["HELP"]
+    trace = [line.split() for line in generate_trace(commands, rows, playlists, trace_length, seed)]
+    start = time.perf_counter()
+    for command in trace:
+        before = time.perf_counter()
+        try:
+            parser.execute_command(command)
+        except CommandException:
+            pass
+        totals[command[0]] += time.perf_counter() - before
+        counts[command[0]] += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "load": load,
+        "commands": {name: totals[name] / counts[name] for name in sorted(counts)},
+        "trace": {"commands": len(trace), "seconds": elapsed},
+    }
+
+
+def flatten(results):
+    """Returns {"size/group/name": seconds} for the per-operation timings of results."""
+    return {f"{size}/{group}/{name}": seconds
+            for size, timings in results["sizes"].items()
+            for group in ("load", "commands")
+            for name, seconds in timings[group].items()}
+
+
+def compare(results, baseline, max_ratio):
+    """Prints how every timing compares with the baseline; returns the regressions."""
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for key in sorted(current.keys() & previous.keys()):
+        ratio = current[key] / previous[key] if previous[key] else float("inf")
+        regressed = ratio > max_ratio and current[key] - previous[key] > NOISE_FLOOR
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<48} {previous[key] * 1e6:>12.1f}us {current[key] * 1e6:>12.1f}us "
+              f"{ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exponents", type=int, nargs="+", default=[3, 4, 5],
+                        help="catalog sizes as powers of ten, up to 7")
+    parser.add_argument("--trace-length", type=int, default=2000)
+    parser.add_argument("--playlists", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--max-ratio", type=float, default=1.25,
+                        help="slowdown against the baseline counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "trace_length": args.trace_length,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for exponent in args.exponents:
+            rows = 10 ** exponent
+            timings = results["sizes"][str(rows)] = bench_size(
+                rows, directory, args.trace_length, args.playlists, args.seed)
+            print(f"{rows:>10} videos: parse {timings['load']['parse']:.2f}s, "
+                  f"snapshot open {timings['load']['snapshot_open'] * 1e3:.2f}ms, "
+                  f"{timings['trace']['commands'] / timings['trace']['seconds']:,.0f} commands/s")
+            for name, seconds in timings["commands"].items():
+                print(f"{'':>12}{name:<24} {seconds * 1e6:>12.1f}us")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.max_ratio)
+        if regressions:
+            print(f"{len(regressions)} timings regressed by more than {args.max_ratio}x",
+                  file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
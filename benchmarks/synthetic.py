@@ -0,0 +1,92 @@
+"""Deterministic synthetic catalogs, playlists and command traces for benchmarks."""
+
+import random
+
+_WORDS = ("funny", "amazing", "cat", "dog", "life", "google", "video", "about",
+          "nothing", "another", "music", "live", "best", "of", "the", "week",
+          "travel", "cooking", "guide", "review", "tutorial", "python", "news")
+_TAGS = ("#cat", "#dog", "#animal", "#google", "#career", "#music", "#travel",
+         "#food", "#news", "#tech", "#funny", "#review")
+
+
+def video_id(i):
+    """Returns the id of the i-th video of a synthetic catalog."""
+    return f"video_{i:08d}"
+
+
+def generate_catalog(rows, seed=0):
+    """Yields `rows` pipe delimited catalog lines, identical for the same seed."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        words = [rng.choice(_WORDS).title() for _ in range(rng.randint(2, 5))]
+        tags = " , ".join(rng.sample(_TAGS, rng.randint(0, 3)))
+        # every title carries its number as a word of its own
+        yield f"{words[0]} {i} {' '.join(words[1:])} | {video_id(i)} | {tags}\n"
+
+
+def write_catalog(path, rows, seed=0):
+    """Writes a synthetic catalog of `rows` videos to path and returns path."""
+    with open(path, "w") as catalog:
+        catalog.writelines(generate_catalog(rows, seed))
+    return path
+
+
+def generate_playlists(rows, playlists, size, seed=0):
+    """Yields (name, video_ids) for `playlists` playlists of `size` videos of a `rows` catalog."""
+    rng = random.Random(seed)
+    for i in range(playlists):
+        yield f"playlist_{i}", [video_id(rng.randrange(rows)) for _ in range(size)]
+
+
+def _tag_expression(rng):
+    first, second, third = rng.sample(_TAGS, 3)
+    return [first, "AND", second, "NOT", third]
+
+
+# command -> its arguments, drawn from rng for a catalog of rows videos with
+# `playlists` playlists; commands missing here are traced without arguments
+_ARGUMENTS = {
+    "PLAY": lambda rng, rows, playlists: [video_id(rng.randrange(rows))],
+    "PLAY_RESULT": lambda rng, rows, playlists: [str(rng.randint(1, 10))],
+    "CREATE_PLAYLIST": lambda rng, rows, playlists: [f"playlist_{rng.randrange(playlists * 2)}"],
+    "ADD_TO_PLAYLIST": lambda rng, rows, playlists: [f"playlist_{rng.randrange(playlists)}",
+                                                     video_id(rng.randrange(rows))],
+    "REMOVE_FROM_PLAYLIST": lambda rng, rows, playlists: [f"playlist_{rng.randrange(playlists)}"]
+    + [video_id(rng.randrange(rows)) for _ in range(3)],
+    "CLEAR_PLAYLIST": lambda rng, rows, playlists: [f"playlist_{rng.randrange(playlists)}"],
+    "DELETE_PLAYLIST": lambda rng, rows, playlists: [f"playlist_{rng.randrange(playlists * 2)}"],
+    "SHOW_PLAYLIST": lambda rng, rows, playlists: [f"playlist_{rng.randrange(playlists)}"],
+    "SHOW_ALL_VIDEOS": lambda rng, rows, playlists: ["OFFSET", str(rng.randrange(rows)),
+                                                     "LIMIT", "20"],
+    "SEARCH_VIDEOS": lambda rng, rows, playlists: [rng.choice(_WORDS)[:rng.randint(2, 6)],
+                                                   "LIMIT", "20"],
+    "SEARCH_VIDEOS_WITH_TAG": lambda rng, rows, playlists:
+        (_tag_expression(rng) if rng.random() < 0.5 else [rng.choice(_TAGS)]) + ["LIMIT", "20"],
+    "FLAG_VIDEO": lambda rng, rows, playlists: [video_id(rng.randrange(rows)), "spam"],
+    "ALLOW_VIDEO": lambda rng, rows, playlists: [video_id(rng.randrange(rows))],
+    "FLAG_VIDEOS": lambda rng, rows, playlists: [f"{video_id(rng.randrange(rows))}|sweep"
+                                                 for _ in range(100)],
+    "ALLOW_VIDEOS": lambda rng, rows, playlists: [video_id(rng.randrange(rows))
+                                                  for _ in range(100)],
+    "COMPLETE": lambda rng, rows, playlists: [video_id(rng.randrange(rows))[:rng.randint(8, 12)]],
+}
+
+
+def generate_trace(commands, rows, playlists, length, seed=0):
+    """Yields `length` command lines cycling through `commands` in a shuffled order.
+
+    Args:
+        commands: The command names to trace, each one equally often.
+        rows: The number of videos of the catalog the trace runs against.
+        playlists: The number of playlists created before the trace runs.
+        length: The number of command lines.
+        seed: Traces are identical for the same seed and arguments.
+    """
+    rng = random.Random(seed)
+    commands = sorted(commands)
+    for i in range(length):
+        if i % len(commands) == 0:
+            rng.shuffle(commands)
+        name = commands[i % len(commands)]
+        arguments = _ARGUMENTS.get(name)
+        yield " ".join([name] + (arguments(rng, rows, playlists) if arguments else []))
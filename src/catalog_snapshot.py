@@ -0,0 +1,263 @@
+"""A binary, memory-mapped snapshot of a video catalog."""
+
+from .video_store import VideoStore
+from array import array
+from pathlib import Path
+import mmap
+import os
+import struct
+import sys
+
+# sections are written in native byte order: a snapshot is a local cache, and
+# one compiled on a machine of the other byte order is simply rebuilt
+_MAGIC = b"YTSNAP1" + sys.byteorder[0].upper().encode()
+
+# magic, source mtime in ns, source size, number of videos, number of tags
+_HEADER = struct.Struct("<8sqqQQ")
+
+# sections follow the header in this order, each one 8-byte aligned; their
+# (offset, size) pairs are stored right after the header
+_SECTIONS = (
+    "id_offsets",  # Q * (videos + 1), into id_data
+    "id_data",
+    "id_order",  # I * videos, ordinals sorted by video id bytes
+    "title_offsets",  # Q * (videos + 1), into title_data
+    "title_data",
+    "tag_offsets",  # Q * (videos + 1), into tag_refs
+    "tag_refs",  # I, tag numbers
+    "tag_name_offsets",  # Q * (tags + 1), into tag_name_data
+    "tag_name_data",
+)
+_SECTION_TABLE = struct.Struct("<" + "QQ" * len(_SECTIONS))
+
+
+class SnapshotError(Exception):
+    """A class used to represent an unreadable snapshot file."""
+    pass
+
+
+def default_snapshot_path(source) -> Path:
+    """Returns where the snapshot of a catalog lives unless told otherwise."""
+    source = Path(source)
+    return source.with_name(source.name + ".snap")
+
+
+def _source_key(source):
+    stat = os.stat(source)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _offsets_and_blob(values):
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for value in values:
+        blob += value
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+def compile_snapshot(source, snapshot_path=None) -> Path:
+    """Parses a pipe delimited catalog and writes its binary snapshot.
+
+    The snapshot is written to a temporary file first and moved into place,
+    so readers never see a half written snapshot.
+
+    Args:
+        source: Path to the text catalog.
+        snapshot_path: Where to write the snapshot, next to the catalog by
+            default.
+
+    Returns:
+        The path of the written snapshot.
+    """
+    from .video_catalog import iter_catalog_rows
+
+    snapshot_path = Path(snapshot_path or default_snapshot_path(source))
+    mtime_ns, size = _source_key(source)
+    store = VideoStore()
+    for title, video_id, tags in iter_catalog_rows(source):
+        store.add(title, video_id, tags)
+    count = len(store)
+
+    ids = [store.video_id(ordinal).encode() for ordinal in range(count)]
+    id_offsets, id_data = _offsets_and_blob(ids)
+    id_order = array("I", sorted(range(count), key=ids.__getitem__))
+    title_offsets, title_data = _offsets_and_blob(
+        store.title(ordinal).encode() for ordinal in range(count))
+    tag_numbers = {}
+    tag_refs = array("I")
+    tag_offsets = array("Q", [0])
+    for ordinal in range(count):
+        for tag in store.tags(ordinal):
+            tag_refs.append(tag_numbers.setdefault(tag, len(tag_numbers)))
+        tag_offsets.append(len(tag_refs))
+    tag_name_offsets, tag_name_data = _offsets_and_blob(tag.encode() for tag in tag_numbers)
+
+    sections = {
+        "id_offsets": id_offsets.tobytes(),
+        "id_data": bytes(id_data),
+        "id_order": id_order.tobytes(),
+        "title_offsets": title_offsets.tobytes(),
+        "title_data": bytes(title_data),
+        "tag_offsets": tag_offsets.tobytes(),
+        "tag_refs": tag_refs.tobytes(),
+        "tag_name_offsets": tag_name_offsets.tobytes(),
+        "tag_name_data": bytes(tag_name_data),
+    }
+    position = _HEADER.size + _SECTION_TABLE.size
+    table = []
+    for name in _SECTIONS:
+        position += -position % 8
+        table += [position, len(sections[name])]
+        position += len(sections[name])
+
+    temporary_path = snapshot_path.with_name(snapshot_path.name + f".{os.getpid()}.tmp")
+    with open(temporary_path, "wb") as snapshot:
+        snapshot.write(_HEADER.pack(_MAGIC, mtime_ns, size, count, len(tag_numbers)))
+        snapshot.write(_SECTION_TABLE.pack(*table))
+        for name in _SECTIONS:
+            snapshot.write(b"\0" * (-snapshot.tell() % 8))
+            snapshot.write(sections[name])
+    os.replace(temporary_path, snapshot_path)
+    return snapshot_path
+
+
+class SnapshotStore(VideoStore):
+    """A VideoStore whose videos are decoded lazily from a mapped snapshot.
+
+    Opening costs the same no matter how large the catalog is: nothing is
+    decoded until a video is asked for, and video ids are found by binary
+    search over the sorted id table. Videos added after opening go to an
+    in-memory VideoStore behind the snapshot.
+    """
+
+    def __init__(self, snapshot_path):
+        super().__init__()
+        with open(snapshot_path, "rb") as snapshot:
+            try:
+                self._map = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise SnapshotError(f"{snapshot_path} is not a catalog snapshot")
+        if len(self._map) < _HEADER.size + _SECTION_TABLE.size:
+            raise SnapshotError(f"{snapshot_path} is not a catalog snapshot")
+        magic, self.source_mtime_ns, self.source_size, count, tag_count = \
+            _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise SnapshotError(f"{snapshot_path} is not a catalog snapshot")
+        table = _SECTION_TABLE.unpack_from(self._map, _HEADER.size)
+        view = memoryview(self._map)
+        sections = {}
+        for i, name in enumerate(_SECTIONS):
+            offset, size = table[2 * i], table[2 * i + 1]
+            if offset + size > len(self._map):
+                raise SnapshotError(f"{snapshot_path} is truncated")
+            sections[name] = view[offset:offset + size]
+
+        def cast(name, item_format, items):
+            section = sections[name]
+            if len(section) != struct.calcsize(item_format) * items:
+                raise SnapshotError(f"{snapshot_path} is damaged: {name} has the wrong size")
+            return section.cast(item_format)
+
+        self._id_offsets = cast("id_offsets", "Q", count + 1)
+        self._id_data = sections["id_data"]
+        self._id_order = cast("id_order", "I", count)
+        self._title_offsets = cast("title_offsets", "Q", count + 1)
+        self._title_data = sections["title_data"]
+        self._tag_offsets = cast("tag_offsets", "Q", count + 1)
+        self._tag_refs = cast("tag_refs", "I", self._tag_offsets[count])
+        self._tag_name_offsets = cast("tag_name_offsets", "Q", tag_count + 1)
+        self._tag_name_data = sections["tag_name_data"]
+        # every offset table must end at the end of the section it points into
+        for offsets, data in ((self._id_offsets, self._id_data),
+                              (self._title_offsets, self._title_data),
+                              (self._tag_name_offsets, self._tag_name_data)):
+            if offsets[-1] != len(data):
+                raise SnapshotError(f"{snapshot_path} is damaged: an offset table is wrong")
+        self._tag_names = [None] * tag_count  # decoded on first use
+        self._count = count
+        self._overrides = {}  # ordinal -> (title, tags) for replaced videos
+        self._tail = VideoStore()  # videos added after opening
+
+    def __len__(self):
+        return self._count + len(self._tail)
+
+    def _stored_id(self, ordinal) -> bytes:
+        return bytes(self._id_data[self._id_offsets[ordinal]:self._id_offsets[ordinal + 1]])
+
+    def _find(self, encoded_id):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) >> 1
+            stored = self._stored_id(self._id_order[middle])
+            if stored < encoded_id:
+                low = middle + 1
+            elif stored > encoded_id:
+                high = middle
+            else:
+                return self._id_order[middle]
+        return None
+
+    def add(self, title, video_id, tags) -> int:
+        ordinal = self._find(video_id.encode())
+        if ordinal is not None:
+            self._overrides[ordinal] = (title, tuple(tags))
+            return ordinal
+        return self._count + self._tail.add(title, video_id, tags)
+
+    def ordinal(self, video_id):
+        ordinal = self._find(video_id.encode())
+        if ordinal is None:
+            ordinal = self._tail.ordinal(video_id)
+            if ordinal is not None:
+                ordinal += self._count
+        return ordinal
+
+    def video_id(self, ordinal) -> str:
+        if ordinal >= self._count:
+            return self._tail.video_id(ordinal - self._count)
+        return self._stored_id(ordinal).decode()
+
+    def title(self, ordinal) -> str:
+        if ordinal >= self._count:
+            return self._tail.title(ordinal - self._count)
+        if ordinal in self._overrides:
+            return self._overrides[ordinal][0]
+        return str(self._title_data[self._title_offsets[ordinal]:self._title_offsets[ordinal + 1]], "utf-8")
+
+    def _tag_name(self, number) -> str:
+        name = self._tag_names[number]
+        if name is None:
+            start, end = self._tag_name_offsets[number], self._tag_name_offsets[number + 1]
+            name = self._tag_names[number] = str(self._tag_name_data[start:end], "utf-8")
+        return name
+
+    def tags(self, ordinal):
+        if ordinal >= self._count:
+            return self._tail.tags(ordinal - self._count)
+        if ordinal in self._overrides:
+            return self._overrides[ordinal][1]
+        refs = self._tag_refs[self._tag_offsets[ordinal]:self._tag_offsets[ordinal + 1]]
+        return tuple(self._tag_name(number) for number in refs)
+
+
+def open_snapshot(source, snapshot_path=None) -> SnapshotStore:
+    """Maps the snapshot of a catalog, rebuilding it first if it is stale.
+
+    A snapshot is stale when it is missing, unreadable, or was compiled from
+    a catalog whose modification time or size differ from the current one.
+
+    Args:
+        source: Path to the text catalog.
+        snapshot_path: Location of the snapshot, next to the catalog by
+            default.
+    """
+    snapshot_path = Path(snapshot_path or default_snapshot_path(source))
+    mtime_ns, size = _source_key(source)
+    try:
+        store = SnapshotStore(snapshot_path)
+        if (store.source_mtime_ns, store.source_size) == (mtime_ns, size):
+            return store
+    except (OSError, SnapshotError):
+        pass
+    return SnapshotStore(compile_snapshot(source, snapshot_path))
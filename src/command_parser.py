@@ -1,6 +1,8 @@
 """A command parser class."""
 
+import sys
 import textwrap
+import time
 from typing import Sequence
 
 
@@ -12,134 +14,103 @@ class CommandException(Exception):
 class CommandParser:
     """A class used to parse and execute a user Command."""
 
-    def __init__(self, video_player):
+    def __init__(self, video_player, stats=None, allow_files=False, allow_stats_reset=False,
+                 max_page=None):
+        """
+        Args:
+            video_player: The VideoPlayer commands are executed on.
+            stats: The Stats recording the calls, errors and latency of
+                every command, shown by STATS. None records nothing.
+            allow_files: Let FLAG_VIDEOS and ALLOW_VIDEOS read @file
+                arguments. Only a parser driven by the local user should,
+                as the files are read from the machine running it.
+            allow_stats_reset: Let STATS RESET clear stats. Stats may be
+                shared, such as by all the sessions of a server, where no
+                single client should be able to clear them.
+            max_page: The most videos SHOW_ALL_VIDEOS and the searches list
+                at once; a missing or larger LIMIT is lowered to it. None
+                lists everything asked for.
+        """
         self._player = video_player
+        self._stats = stats
+        self._allow_files = allow_files
+        self._allow_stats_reset = allow_stats_reset
+        self._max_page = max_page
+
+    @property
+    def stats(self):
+        """Returns the Stats commands are recorded in, None if they are not."""
+        return self._stats
+
+    @property
+    def output(self):
+        """Returns the sink of the player, where command messages go too."""
+        return self._player.output
+
+    # command name -> (handler, accepted argument counts, usage message)
+    _commands = {}
+
+    @classmethod
+    def register_command(cls, name, handler, argument_counts=None, usage=None):
+        """Makes a command available to every parser.
+
+        Args:
+            name: The command name, matched ignoring case.
+            handler: Called with the parser followed by the command arguments.
+            argument_counts: The numbers of arguments the command accepts,
+                such as a tuple or a range. None accepts any arguments and
+                does not pass them on.
+            usage: The message of the CommandException raised when the
+                command gets a number of arguments it does not accept.
+        """
+        cls._commands[name.upper()] = (handler, argument_counts, usage)
 
     def execute_command(self, command: Sequence[str]):
         """Executes the user command. Expects the command to be upper case.
            Raises CommandException if a command cannot be parsed.
+           Returns False if the command is unknown, True otherwise.
         """
         if not command:
             raise CommandException(
                 "Please enter a valid command, "
                 "type HELP for a list of available commands.")
 
-        if command[0].upper() == "NUMBER_OF_VIDEOS":
-            self._player.number_of_videos()
-
-        elif command[0].upper() == "SHOW_ALL_VIDEOS":
-            self._player.show_all_videos()
-
-        elif command[0].upper() == "PLAY":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter PLAY command followed by video_id.")
-            self._player.play_video(command[1])
-
-        elif command[0].upper() == "PLAY_RANDOM":
-            self._player.play_random_video()
-
-        elif command[0].upper() == "STOP":
-            self._player.stop_video()
-
-        elif command[0].upper() == "PAUSE":
-            self._player.pause_video()
-
-        elif command[0].upper() == "CONTINUE":
-            self._player.continue_video()
-
-        elif command[0].upper() == "SHOW_PLAYING":
-            self._player.show_playing()
-
-        elif command[0].upper() == "CREATE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CREATE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.create_playlist(command[1])
-
-        elif command[0].upper() == "ADD_TO_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter ADD_TO_PLAYLIST command followed by a "
-                    "playlist name and video_id to add.")
-            self._player.add_to_playlist(command[1], command[2])
-
-        elif command[0].upper() == "REMOVE_FROM_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter REMOVE_FROM_PLAYLIST command followed by a "
-                    "playlist name and video_id to remove.")
-            self._player.remove_from_playlist(command[1], command[2])
-
-        elif command[0].upper() == "CLEAR_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CLEAR_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.clear_playlist(command[1])
-
-        elif command[0].upper() == "DELETE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter DELETE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.delete_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SHOW_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.show_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_ALL_PLAYLISTS":
-            self._player.show_all_playlists()
-
-        elif command[0].upper() == "SEARCH_VIDEOS":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS command followed by a "
-                    "search term.")
-            self._player.search_videos(command[1])
-
-        elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
-                    "video tag.")
-            self._player.search_videos_tag(command[1])
-
-        elif command[0].upper() == "FLAG_VIDEO":
-            if len(command) == 3:
-                self._player.flag_video(command[1], command[2])
-            elif len(command) == 2:
-                self._player.flag_video(command[1])
-            else:
-                raise CommandException(
-                    "Please enter FLAG_VIDEO command followed by a "
-                    "video_id and an optional flag reason.")
-
-        elif command[0].upper() == "ALLOW_VIDEO":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter ALLOW_VIDEO command followed by a "
-                    "video_id.")
-            self._player.allow_video(command[1])
-
-        elif command[0].upper() == "HELP":
-            self._get_help()
-        else:
-            print(
+        name = command[0].upper()
+        entry = self._commands.get(name)
+        if entry is None:
+            if self._stats is not None:
+                self._stats.count("commands.unknown")
+            self.output.print(
                 "Please enter a valid command, type HELP for a list of "
                 "available commands.")
+            return False
+        if self._stats is None:
+            self._dispatch(entry, command)
+            return True
+        start = time.perf_counter_ns()
+        failed = True
+        try:
+            self._dispatch(entry, command)
+            failed = False
+        finally:
+            self._stats.record_command(name, time.perf_counter_ns() - start, failed)
+        return True
+
+    def _dispatch(self, entry, command):
+        handler, argument_counts, usage = entry
+        if argument_counts is None:
+            handler(self)
+        elif len(command) - 1 in argument_counts:
+            handler(self, *command[1:])
+        else:
+            raise CommandException(usage)
 
     def _get_help(self):
         """Displays all available commands to the user."""
         help_text = textwrap.dedent("""
         Available commands:
             NUMBER_OF_VIDEOS - Shows how many videos are in the library.
-            SHOW_ALL_VIDEOS - Lists all videos from the library.
+            SHOW_ALL_VIDEOS [OFFSET <n>] [LIMIT <n>] - Lists all videos from the library, optionally one page of them.
             PLAY <video_id> - Plays specified video.
             PLAY_RANDOM - Plays a random video from the library.
             STOP - Stop the current video.
@@ -148,16 +119,232 @@ class CommandParser:
             SHOW_PLAYING - Displays the title, url and paused status of the video that is currently playing (or paused).
             CREATE_PLAYLIST <playlist_name> - Creates a new (empty) playlist with the provided name.
             ADD_TO_PLAYLIST <playlist_name> <video_id> - Adds the requested video to the playlist.
-            REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the specified video from the specified playlist
+            REMOVE_FROM_PLAYLIST <playlist_name> <video_id>... - Removes the specified videos from the specified playlist
             CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the playlist.
             DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
             SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
             SHOW_ALL_PLAYLISTS - Display all the available playlists.
-            SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
-            SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
+            SEARCH_VIDEOS <search_term> [OFFSET <n>] [LIMIT <n>] - Display all the videos whose titles contain the search_term, optionally one page of them.
+            SEARCH_VIDEOS_WITH_TAG <tag_name> [OFFSET <n>] [LIMIT <n>] -Display all videos whose tags contains the provided tag, optionally one page of them.
+                The tag may also be an expression such as #cat AND #animal NOT #google, using AND, OR, NOT and parentheses.
+            PLAY_RESULT <number> - Plays a video of the last search results by its number.
+            COMPLETE <prefix> [k] - Shows up to k (default 10) videos whose id or title starts with prefix.
             FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
             ALLOW_VIDEO <video_id> - Removes a flag from a video.
+            FLAG_VIDEOS <video_id>[|<flag_reason>]... - Flags many videos at once; @<file> reads video_id|flag_reason lines from a file.
+            ALLOW_VIDEOS <video_id>... - Removes the flags of many videos at once; @<file> reads video_ids from a file.
+            STATS [RESET] - Shows the calls, errors and latency of every command and the library counters.
             HELP - Displays help.
             EXIT - Terminates the program execution.
         """)
-        print(help_text)
+        self.output.print(help_text)
+
+
+# the longest number a command accepts, in digits
+_MAX_DIGITS = len(str(sys.maxsize))
+
+
+def _number(value, usage) -> int:
+    """Parses a count or position of at most sys.maxsize, or raises CommandException(usage)."""
+    # isdigit() alone also accepts digits like ² that int() rejects
+    if not (value.isascii() and value.isdecimal()) or len(value) > _MAX_DIGITS:
+        raise CommandException(usage)
+    number = int(value)
+    if number > sys.maxsize:
+        raise CommandException(usage)
+    return number
+
+
+def _paging(parser, arguments, usage):
+    """Parses OFFSET <n> and LIMIT <n> options into an (offset, limit) pair, within the parser's max_page."""
+    options = {"OFFSET": 0, "LIMIT": None}
+    if len(arguments) % 2:
+        raise CommandException(usage)
+    for name, value in zip(arguments[::2], arguments[1::2]):
+        name = name.upper()
+        if name not in options:
+            raise CommandException(usage)
+        options[name] = _number(value, usage)
+    # an empty page would read as if nothing matched
+    if options["LIMIT"] == 0:
+        raise CommandException(usage)
+    limit = options["LIMIT"]
+    if parser._max_page is not None and (limit is None or limit > parser._max_page):
+        limit = parser._max_page
+    return options["OFFSET"], limit
+
+
+def _show_all_videos(parser, *arguments):
+    offset, limit = _paging(parser, arguments, _SHOW_ALL_VIDEOS_USAGE)
+    parser._player.show_all_videos(offset, limit)
+
+
+_SHOW_ALL_VIDEOS_USAGE = ("Please enter SHOW_ALL_VIDEOS command optionally followed by "
+                          "OFFSET <number> and LIMIT <number>.")
+
+
+def _search_videos(parser, term, *arguments):
+    offset, limit = _paging(parser, arguments, _SEARCH_VIDEOS_USAGE)
+    parser._player.search_videos(term, offset, limit)
+
+
+_SEARCH_VIDEOS_USAGE = ("Please enter SEARCH_VIDEOS command followed by a search term, "
+                        "optionally followed by OFFSET <number> and LIMIT <number>.")
+
+
+def _search_videos_with_tag(parser, *arguments):
+    # paging options come last, everything before them is the tag expression
+    expression = list(arguments)
+    options = []
+    while len(expression) > 2 and expression[-2].upper() in ("OFFSET", "LIMIT"):
+        options[:0] = expression[-2:]
+        del expression[-2:]
+    offset, limit = _paging(parser, options, _SEARCH_VIDEOS_WITH_TAG_USAGE)
+    parser._player.search_videos_tag(" ".join(expression), offset, limit)
+
+
+_SEARCH_VIDEOS_WITH_TAG_USAGE = (
+    "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a video tag or an expression "
+    "of tags, optionally followed by OFFSET <number> and LIMIT <number>.")
+
+
+def _moderation_items(parser, arguments):
+    """Yields (video_id, reason) pairs from video_id|reason arguments and @file arguments."""
+    for argument in arguments:
+        if argument.startswith("@"):
+            if not parser._allow_files:
+                raise CommandException("Cannot read files: @file arguments are not allowed here")
+            try:
+                with open(argument[1:]) as items:
+                    lines = [line.strip() for line in items]
+            except OSError as e:
+                raise CommandException(f"Cannot read {argument[1:]}: {e.strerror}")
+            lines = [line for line in lines if line and not line.startswith("#")]
+        else:
+            lines = [argument]
+        for line in lines:
+            video_id, _, reason = line.partition("|")
+            yield video_id.strip(), reason.strip()
+
+
+def _flag_videos(parser, *arguments):
+    parser._player.flag_videos(list(_moderation_items(parser, arguments)))
+
+
+def _allow_videos(parser, *arguments):
+    parser._player.allow_videos([video_id for video_id, _ in _moderation_items(parser, arguments)])
+
+
+def _play_result(parser, number):
+    parser._player.play_result(_number(number, _PLAY_RESULT_USAGE))
+
+
+_PLAY_RESULT_USAGE = "Please enter PLAY_RESULT command followed by the number of a search result."
+
+
+# the most completions COMPLETE shows; a larger k is lowered to it
+MAX_COMPLETIONS = 100
+
+
+def _complete(parser, prefix, k="10"):
+    k = _number(k, _COMPLETE_USAGE)
+    if k < 1:
+        raise CommandException(_COMPLETE_USAGE)
+    k = min(k, MAX_COMPLETIONS)
+    if parser._max_page is not None:
+        k = min(k, parser._max_page)
+    parser._player.complete(prefix, k)
+
+
+_COMPLETE_USAGE = ("Please enter COMPLETE command followed by a prefix and optionally "
+                   "the number of completions.")
+
+
+def _format_latency(seconds) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def _stats(parser, action=None):
+    if action is not None and action.upper() != "RESET":
+        raise CommandException(_STATS_USAGE)
+    if parser.stats is None:
+        parser.output.print("Cannot show stats: Statistics are switched off")
+        return
+    if action is not None:
+        if not parser._allow_stats_reset:
+            parser.output.print("Cannot reset stats: Resetting is not allowed here")
+            return
+        parser.stats.reset()
+        parser.output.print("Successfully reset stats")
+        return
+    snapshot = parser.stats.snapshot()
+    parser.output.print("Command statistics:")
+    for name, command in snapshot["commands"].items():
+        latencies = ", ".join(f"{label} {_format_latency(command[label])}"
+                              for label in ("mean", "p50", "p95", "p99", "max"))
+        parser.output.print(f"  {name}: {command['calls']} calls, {command['errors']} errors, "
+                            f"{latencies}")
+    parser.output.print("Counters:")
+    for name, value in snapshot["counters"].items():
+        parser.output.print(f"  {name}: {value}")
+
+
+_STATS_USAGE = "Please enter STATS command, optionally followed by RESET."
+
+
+def _player_command(method_name):
+    """Returns a handler calling the named VideoPlayer method with the command arguments."""
+    def handler(parser, *arguments):
+        return getattr(parser._player, method_name)(*arguments)
+    return handler
+
+
+for _name, _method_name, _argument_counts, _usage in (
+        ("NUMBER_OF_VIDEOS", "number_of_videos", None, None),
+        ("PLAY", "play_video", (1,),
+         "Please enter PLAY command followed by video_id."),
+        ("PLAY_RANDOM", "play_random_video", None, None),
+        ("STOP", "stop_video", None, None),
+        ("PAUSE", "pause_video", None, None),
+        ("CONTINUE", "continue_video", None, None),
+        ("SHOW_PLAYING", "show_playing", None, None),
+        ("CREATE_PLAYLIST", "create_playlist", (1,),
+         "Please enter CREATE_PLAYLIST command followed by a playlist name."),
+        ("ADD_TO_PLAYLIST", "add_to_playlist", (2,),
+         "Please enter ADD_TO_PLAYLIST command followed by a "
+         "playlist name and video_id to add."),
+        ("REMOVE_FROM_PLAYLIST", "remove_from_playlist", range(2, sys.maxsize),
+         "Please enter REMOVE_FROM_PLAYLIST command followed by a "
+         "playlist name and video_id to remove."),
+        ("CLEAR_PLAYLIST", "clear_playlist", (1,),
+         "Please enter CLEAR_PLAYLIST command followed by a playlist name."),
+        ("DELETE_PLAYLIST", "delete_playlist", (1,),
+         "Please enter DELETE_PLAYLIST command followed by a playlist name."),
+        ("SHOW_PLAYLIST", "show_playlist", (1,),
+         "Please enter SHOW_PLAYLIST command followed by a playlist name."),
+        ("SHOW_ALL_PLAYLISTS", "show_all_playlists", None, None),
+        ("FLAG_VIDEO", "flag_video", (1, 2),
+         "Please enter FLAG_VIDEO command followed by a "
+         "video_id and an optional flag reason."),
+        ("ALLOW_VIDEO", "allow_video", (1,),
+         "Please enter ALLOW_VIDEO command followed by a video_id."),
+):
+    CommandParser.register_command(_name, _player_command(_method_name), _argument_counts, _usage)
+CommandParser.register_command("SHOW_ALL_VIDEOS", _show_all_videos, (0, 2, 4), _SHOW_ALL_VIDEOS_USAGE)
+CommandParser.register_command("SEARCH_VIDEOS", _search_videos, (1, 3, 5), _SEARCH_VIDEOS_USAGE)
+CommandParser.register_command("SEARCH_VIDEOS_WITH_TAG", _search_videos_with_tag,
+                               range(1, sys.maxsize), _SEARCH_VIDEOS_WITH_TAG_USAGE)
+CommandParser.register_command("PLAY_RESULT", _play_result, (1,), _PLAY_RESULT_USAGE)
+CommandParser.register_command("COMPLETE", _complete, (1, 2), _COMPLETE_USAGE)
+CommandParser.register_command(
+    "FLAG_VIDEOS", _flag_videos, range(1, sys.maxsize),
+    "Please enter FLAG_VIDEOS command followed by video_id|flag_reason items or @file.")
+CommandParser.register_command(
+    "ALLOW_VIDEOS", _allow_videos, range(1, sys.maxsize),
+    "Please enter ALLOW_VIDEOS command followed by video_ids or @file.")
+CommandParser.register_command("STATS", _stats, (0, 1), _STATS_USAGE)
+CommandParser.register_command("HELP", CommandParser._get_help)
@@ -1,14 +1,22 @@
 """A youtube terminal simulator."""
+from .video_journal import Journal
+from .video_library import VideoLibrary
+from .video_output import BufferedSink
 from .video_player import VideoPlayer
+from .video_stats import Stats
 from .command_parser import CommandException
 from .command_parser import CommandParser
+import argparse
+import sys
 
+# number of messages held back before batch mode writes them out
+BATCH_BUFFER_SIZE = 4096
 
-if __name__ == "__main__":
-    print("""Hello and welcome to YouTube, what would you like to do?
+
+def run_interactive(parser):
+    """Reads commands from the terminal, one per prompt, until EXIT."""
+    parser.output.print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
-    parser = CommandParser(video_player)
     while True:
         command = input("YT> ")
         if command.upper() == "EXIT":
@@ -16,6 +24,100 @@ if __name__ == "__main__":
         try:
             parser.execute_command(command.split())
         except CommandException as e:
-            print(e)
-    print("YouTube has now terminated its execution. "
-          "Thank you and goodbye!")
+            parser.output.print(e)
+        except Exception as e:  # a failing command must not end the session
+            parser.output.print(f"Cannot execute command: {e}")
+    parser.output.print("YouTube has now terminated its execution. "
+                        "Thank you and goodbye!")
+
+
+def run_batch(lines, parser, stop_on_error=False):
+    """Executes a script of commands, one per line, until EXIT or the end of the script.
+
+    Blank lines and lines starting with # are skipped. A command fails when
+    it cannot be parsed, is unknown or raises an error; its message is
+    printed like in interactive mode.
+
+    Args:
+        lines: An iterable of command lines, such as an open file.
+        parser: The CommandParser executing the commands.
+        stop_on_error: Stop at the first failing command instead of
+            carrying on with the rest of the script.
+
+    Returns:
+        A (commands executed, commands failed) pair.
+    """
+    executed = failed = 0
+    for line in lines:
+        command = line.split()
+        if not command or command[0].startswith("#"):
+            continue
+        if command[0].upper() == "EXIT":
+            break
+        executed += 1
+        try:
+            if parser.execute_command(command):
+                continue
+        except CommandException as e:
+            parser.output.print(e)
+        except Exception as e:
+            parser.output.print(f"Cannot execute command: {e}")
+        failed += 1
+        if stop_on_error:
+            break
+    return executed, failed
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument(
+        "script", nargs="?",
+        help="execute the commands in this file (- for standard input) instead of "
+             "prompting for them; piped standard input is executed the same way")
+    arguments.add_argument(
+        "--on-error", choices=("continue", "stop"), default="continue",
+        help="what a script does after a failing command (default: continue)")
+    arguments.add_argument(
+        "--journal", metavar="PATH",
+        help="keep playlists and flags in this journal, restoring them on start")
+    arguments.add_argument(
+        "--no-stats", action="store_true",
+        help="do not record the command latencies and counters shown by STATS")
+    options = arguments.parse_args(argv)
+
+    interactive = options.script is None and sys.stdin.isatty()
+    # a script's output is written in bulk rather than line by line
+    output = None if interactive else BufferedSink(capacity=BATCH_BUFFER_SIZE)
+    journal = Journal(options.journal) if options.journal else None
+    stats = None if options.no_stats else Stats()
+    # a script cannot answer the play question, its next line would be taken
+    # as the answer; it uses PLAY_RESULT instead
+    video_player = VideoPlayer(VideoLibrary(snapshot=True, output=output, stats=stats), output,
+                               journal=journal, interactive=interactive)
+    # @file arguments and resetting stats are for the user running the
+    # simulator only
+    parser = CommandParser(video_player, stats, allow_files=True, allow_stats_reset=True)
+    try:
+        if interactive:
+            run_interactive(parser)
+            return 0
+        stop_on_error = options.on_error == "stop"
+        try:
+            if options.script in (None, "-"):
+                executed, failed = run_batch(sys.stdin, parser, stop_on_error)
+            else:
+                with open(options.script) as script:
+                    executed, failed = run_batch(script, parser, stop_on_error)
+        finally:
+            output.flush()
+    finally:
+        if journal is not None:
+            journal.close()
+    if failed:
+        print(f"{failed} of {executed} commands failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""A line protocol server letting many users drive the simulator at once.
+
+Clients send one command per line, in the language of the terminal
+simulator, and may send many commands without waiting for their responses.
+Every response is the output of its command, one message per line,
+followed by a line holding a single dot; output lines starting with a dot
+get a second dot in front of them. EXIT closes the connection.
+
+Every connection gets a session of its own: its own player, playlists and
+flags. STATS shows the numbers of all sessions together. Run from the
+repository root:
+    python -m src.server --port 8765
+"""
+
+from .command_parser import CommandException, CommandParser
+from .video_library import DEFAULT_CATALOG, VideoLibrary
+from .video_output import CollectingSink
+from .video_player import VideoPlayer
+from .video_stats import Stats
+import argparse
+import asyncio
+import logging
+
+_log = logging.getLogger(__name__)
+
+# longest command line accepted, in bytes
+MAX_LINE_LENGTH = 1 << 16
+
+# connections waiting to be accepted, enough for bursts of new sessions
+BACKLOG = 4096
+
+# marks the end of a response
+END_OF_RESPONSE = "."
+
+# the most videos one response lists, so that no response holds the whole
+# catalog; clients page through the rest with OFFSET
+MAX_PAGE = 100
+
+
+class Session:
+    """The state of one connection: its own player, parser and output."""
+
+    def __init__(self, catalog=DEFAULT_CATALOG, stats=None):
+        """
+        Args:
+            catalog: The catalog path the session plays from.
+            stats: The Stats the session's commands are recorded in, None
+                records nothing.
+        """
+        self._output = CollectingSink()
+        # a session never waits for the answer to a play question, search
+        # results are played with PLAY_RESULT instead
+        library = VideoLibrary(catalog, snapshot=True, output=self._output, stats=stats)
+        player = VideoPlayer(library, self._output, interactive=False)
+        self._parser = CommandParser(player, stats, max_page=MAX_PAGE)
+
+    def execute(self, line):
+        """Executes one command line and returns its output lines."""
+        try:
+            self._parser.execute_command(line.split())
+        except CommandException as e:
+            self._output.print(e)
+        except Exception:
+            # a failing command must not take the connection, or the
+            # commands pipelined after it, down with it
+            _log.exception("Command failed: %s", line)
+            self._output.print("Cannot execute command: Internal error")
+        return self._output.take()
+
+
+def encode_response(lines) -> bytes:
+    """Returns the wire form of a response made of lines."""
+    return "".join(("." + line if line.startswith(".") else line) + "\n"
+                   for message in lines for line in message.split("\n")).encode() \
+        + (END_OF_RESPONSE + "\n").encode()
+
+
+class VideoServer:
+    """Serves sessions over TCP or a Unix socket."""
+
+    def __init__(self, catalog=DEFAULT_CATALOG, stats=None):
+        """
+        Args:
+            catalog: The catalog path every session plays from.
+            stats: The Stats all sessions record their commands in, None
+                records nothing.
+        """
+        self._catalog = catalog
+        self.stats = stats
+        self.sessions = 0  # sessions currently connected
+
+    async def handle_connection(self, reader, writer):
+        self.sessions += 1
+        try:
+            session = Session(self._catalog, self.stats)
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # the line is longer than MAX_LINE_LENGTH
+                    writer.write(encode_response(["Command is too long"]))
+                    break
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                if command.upper() == "EXIT":
+                    writer.write(encode_response(["YouTube has now terminated its execution. "
+                                                  "Thank you and goodbye!"]))
+                    break
+                writer.write(encode_response(session.execute(command)))
+                # stop reading pipelined commands while the client is not
+                # reading the responses to the previous ones
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host="127.0.0.1", port=8765, unix_path=None):
+        """Starts listening and returns the asyncio server."""
+        # compile the snapshot and build the indexes once, before any session
+        # can be kept waiting for them
+        VideoLibrary(self._catalog, snapshot=True).catalog.build_indexes()
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, unix_path,
+                                                   limit=MAX_LINE_LENGTH, backlog=BACKLOG)
+        return await asyncio.start_server(self.handle_connection, host, port,
+                                          limit=MAX_LINE_LENGTH, backlog=BACKLOG)
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, catalog=DEFAULT_CATALOG,
+                stats=None):
+    server = await VideoServer(catalog, stats).start(host, port, unix_path)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__,
+                                        formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument("--host", default="127.0.0.1")
+    arguments.add_argument("--port", type=int, default=8765)
+    arguments.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead")
+    arguments.add_argument("--catalog", default=DEFAULT_CATALOG)
+    arguments.add_argument("--no-stats", action="store_true",
+                           help="do not record the command latencies and counters shown by STATS")
+    options = arguments.parse_args(argv)
+    stats = None if options.no_stats else Stats()
+    try:
+        asyncio.run(serve(options.host, options.port, options.unix, options.catalog, stats))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Boolean tag expressions, evaluated over bitsets of videos.
+
+An expression combines tags with AND, OR and NOT, for example
+    #cat AND #animal NOT #google
+    (#cat OR #dog) #animal
+Tags next to each other are joined with AND, NOT binds tighter than AND,
+and AND binds tighter than OR. Operators ignore case.
+
+A bitset is a Python int whose bit n is set when the video with ordinal n
+is in the set, so every operator is one bulk integer operation over the
+whole catalog.
+"""
+
+import re
+
+_TOKEN = re.compile(r"\(|\)|[^\s()]+")
+
+_OPERATORS = ("AND", "OR", "NOT")
+
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+# deepest parenthesis nesting accepted; each level costs a few stack frames
+MAX_NESTING = 100
+
+
+class TagQueryError(Exception):
+    """A class used to represent a tag expression that cannot be parsed."""
+    pass
+
+
+def is_tag_query(text) -> bool:
+    """Returns whether text is more than a single tag."""
+    tokens = _TOKEN.findall(text)
+    return len(tokens) != 1 or tokens[0].upper() in _OPERATORS
+
+
+def evaluate(text, tag_bits, universe):
+    """Returns the bitset of the videos matching a tag expression.
+
+    Args:
+        text: The expression.
+        tag_bits: Returns the bitset of the videos carrying a tag.
+        universe: The bitset of all videos, which NOT is taken against.
+    """
+    tokens = _TOKEN.findall(text)
+    position = 0
+    nesting = 0
+
+    def peek():
+        return tokens[position].upper() if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def union():
+        bits = intersection()
+        while peek() == "OR":
+            take()
+            bits |= intersection()
+        return bits
+
+    def intersection():
+        bits = factor()
+        while peek() not in (None, "OR", ")"):
+            if peek() == "AND":
+                take()
+            bits &= factor()
+        return bits
+
+    def factor():
+        nonlocal nesting
+        # a run of NOTs is folded into one, so it does not recurse
+        negated = False
+        while peek() == "NOT":
+            take()
+            negated = not negated
+        token = peek()
+        if token is None:
+            raise TagQueryError("The tag expression ends too early")
+        take()
+        if token == "(":
+            if nesting == MAX_NESTING:
+                raise TagQueryError(f"The tag expression nests more than {MAX_NESTING} parentheses")
+            nesting += 1
+            bits = union()
+            nesting -= 1
+            if peek() != ")":
+                raise TagQueryError("A parenthesis of the tag expression is not closed")
+            take()
+        elif token in (")", "AND", "OR"):
+            raise TagQueryError(f"Unexpected {tokens[position - 1]} in the tag expression")
+        else:
+            bits = tag_bits(tokens[position - 1])
+        return universe & ~bits if negated else bits
+
+    bits = union()
+    if position < len(tokens):
+        raise TagQueryError(f"Unexpected {tokens[position]} in the tag expression")
+    return bits
+
+
+def bits_from_ordinals(ordinals, size) -> int:
+    """Returns the bitset of the given ordinals, all smaller than size."""
+    data = bytearray((size + 7) >> 3)
+    for ordinal in ordinals:
+        data[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(data, "little")
+
+
+def iter_ordinals(bits):
+    """Yields the ordinals of a bitset in ascending order."""
+    data = bits.to_bytes((bits.bit_length() + 7) >> 3, "little")
+    # empty bytes are skipped by the regular expression engine
+    for match in _NONZERO_BYTE.finditer(data):
+        byte = data[match.start()]
+        while byte:
+            lowest = byte & -byte
+            yield (match.start() << 3) + lowest.bit_length() - 1
+            byte ^= lowest
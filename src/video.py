@@ -3,9 +3,16 @@
 from typing import Sequence
 
 
+def format_video(title, video_id, tags) -> str:
+    """Returns the 'title (video_id) [tags]' line videos are listed with."""
+    return title + " (" + video_id + ") [" + " ".join(tags).strip() + "]"
+
+
 class Video:
     """A class used to represent a Video."""
 
+    __slots__ = ("_title", "_video_id", "_tags", "_flagged", "_flag_reason")
+
     def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str], flagged: bool, flag_reason: str):
         """Video constructor."""
         self._title = video_title
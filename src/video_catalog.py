@@ -0,0 +1,252 @@
+"""The videos of a catalog, shared by every library reading from it."""
+
+from .catalog_snapshot import open_snapshot
+from .video import format_video
+from .video_index import PrefixIndex, RenderCache, SortedListing, TagIndex, TitleIndex, TrigramIndex
+from .tag_query import bits_from_ordinals
+from .video_store import VideoStore
+from pathlib import Path
+import csv
+import itertools
+import os
+import threading
+
+# catalog shipped with the simulator, used when no other source is given
+DEFAULT_CATALOG = Path(__file__).parent / "videos.txt"
+
+# number of catalog rows parsed per ingest step
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def iter_catalog_rows(source):
+    """Lazily yields (title, video_id, tags) for every row of a catalog.
+
+    Args:
+        source: A path to a pipe delimited catalog, or an open text file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="") as video_file:
+            yield from iter_catalog_rows(video_file)
+        return
+    for video_info in csv.reader(source, delimiter="|"):
+        if not video_info:  # skip blank lines
+            continue
+        title, url, tags = video_info
+        tags = tags.strip()
+        yield title.strip(), url.strip(), [tag.strip() for tag in tags.split(",")] if tags else []
+
+
+class VideoCatalog:
+    """The videos of a catalog and the indexes that do not depend on flags.
+
+    A catalog holds no per-user state, so any number of libraries can read
+    from one catalog, each keeping its own flags. Indexes are built on first
+    use and kept up to date as videos are added.
+    """
+
+    _shared = {}  # (catalog path, snapshot) -> (source key, catalog)
+    _shared_lock = threading.Lock()
+
+    def __init__(self, store=None):
+        """
+        Args:
+            store: The VideoStore holding the videos, an empty one by default.
+        """
+        self.store = store if store is not None else VideoStore()
+        self.replacements = 0  # number of videos replaced in place so far
+        self._frozen = False
+        self._title_index = None
+        self._trigram_index = None
+        self._tag_index = None  # every video by tag, flagged or not
+        self._prefix_index = None  # video ids and titles, for completion
+        self._tag_bits = {}  # casefolded tag -> bitset of its videos, for tag expressions
+        self._all_bits = None  # bitset of every video, which NOT is taken against
+        self._listing = None
+        # listing lines of recently shown videos, shared by every library;
+        # libraries only add the flag of a flagged video to them
+        self._line_cache = RenderCache(self._format_line)
+
+    @classmethod
+    def load(cls, source, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, snapshot=False):
+        """Returns a new catalog holding the videos of source.
+
+        Args:
+            source: A path or open text file to load the catalog from.
+            chunk_size: Number of rows parsed per ingest step.
+            progress: Optional callable receiving the number of videos
+                loaded so far after every chunk.
+            snapshot: Map a binary snapshot of a catalog path instead of
+                parsing it, compiling the snapshot first if it is missing or
+                stale. True keeps it next to the catalog, a path puts it
+                there instead. Falls back to parsing when the snapshot
+                cannot be written.
+        """
+        if snapshot:
+            if not isinstance(source, (str, os.PathLike)):
+                raise ValueError("A snapshot can only be used for a catalog path")
+            try:
+                # videos are decoded from the snapshot on access
+                return cls(open_snapshot(source, None if snapshot is True else snapshot))
+            except OSError:
+                pass  # the snapshot cannot be written here, parse the catalog instead
+        catalog = cls()
+        for _ in catalog.ingest(source, chunk_size, progress):
+            pass
+        return catalog
+
+    @classmethod
+    def shared(cls, source=DEFAULT_CATALOG, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+               snapshot=False):
+        """Returns the catalog of a path, loading it only once per process.
+
+        The catalog is read-only. It is loaded again, into a new catalog,
+        when the file has changed since it was last loaded. Arguments are
+        those of load().
+        """
+        path = os.path.abspath(source)
+        key = (path, snapshot if snapshot in (False, True) else os.path.abspath(snapshot))
+        stat = os.stat(path)
+        source_key = (stat.st_mtime_ns, stat.st_size)
+        with cls._shared_lock:
+            loaded = cls._shared.get(key)
+            if loaded is not None and loaded[0] == source_key:
+                return loaded[1]
+            catalog = cls.load(path, chunk_size, progress, snapshot)
+            catalog._frozen = True
+            cls._shared[key] = (source_key, catalog)
+            return catalog
+
+    @property
+    def frozen(self) -> bool:
+        """Returns whether the catalog is shared and can no longer change."""
+        return self._frozen
+
+    def ingest(self, source, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        """Loads a catalog one chunk at a time, see VideoLibrary.ingest."""
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive number")
+        rows = iter_catalog_rows(source)
+        loaded = 0
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            for title, url, tags in chunk:
+                self.add(title, url, tags)
+            loaded += len(chunk)
+            if progress is not None:
+                progress(loaded)
+            yield loaded
+
+    def add(self, title, video_id, tags) -> int:
+        """Adds a video, replacing any video with the same id, and returns its ordinal."""
+        if self._frozen:
+            raise ValueError("A shared catalog cannot be changed")
+        store = self.store
+        if self._tag_bits:
+            self._tag_bits = {}  # rebuilt from the tag index on the next expression
+        self._all_bits = None
+        replaced = store.ordinal(video_id)
+        if replaced is not None:
+            self.replacements += 1
+            if self._listing is not None:
+                self._listing.remove(replaced, self.line(replaced))
+            if self._title_index is not None:
+                self._title_index.remove(replaced, store.title(replaced))
+            if self._trigram_index is not None:
+                self._trigram_index.remove(replaced, store.title(replaced))
+            if self._tag_index is not None:
+                self._tag_index.remove(replaced, store.tags(replaced))
+            if self._prefix_index is not None:
+                self._prefix_index.remove(replaced, (video_id, store.title(replaced)))
+            self._line_cache.invalidate(replaced)
+        ordinal = store.add(title, video_id, tags)
+        if self._title_index is not None:
+            self._title_index.add(ordinal, title)
+        if self._trigram_index is not None:
+            self._trigram_index.add(ordinal, title)
+        if self._tag_index is not None:
+            self._tag_index.add(ordinal, tags)
+        if self._listing is not None:
+            self._listing.add(ordinal)
+        if self._prefix_index is not None:
+            self._prefix_index.add(ordinal, (video_id, title))
+        return ordinal
+
+    def __len__(self):
+        return len(self.store)
+
+    def _format_line(self, ordinal) -> str:
+        store = self.store
+        return format_video(store.title(ordinal), store.video_id(ordinal), store.tags(ordinal))
+
+    def line(self, ordinal) -> str:
+        """Returns the 'title (video_id) [tags]' line of a video, from the line cache."""
+        return self._line_cache.get(ordinal)
+
+    def line_cache_stats(self) -> dict:
+        """Returns the counters of the line cache, see RenderCache.stats."""
+        return self._line_cache.stats()
+
+    def build_indexes(self):
+        """Builds every index now rather than on first use.
+
+        A server calls this before accepting connections, so that no
+        session waits for an index to be built.
+        """
+        self.title_index()
+        self.trigram_index()
+        self.tag_index()
+        self.prefix_index()
+        self.listing()
+
+    def title_index(self) -> TitleIndex:
+        if self._title_index is None:
+            store = self.store
+            self._title_index = TitleIndex.build(
+                (ordinal, store.title(ordinal)) for ordinal in range(len(store)))
+        return self._title_index
+
+    def trigram_index(self) -> TrigramIndex:
+        if self._trigram_index is None:
+            store = self.store
+            self._trigram_index = TrigramIndex.build(
+                (ordinal, store.title(ordinal)) for ordinal in range(len(store)))
+        return self._trigram_index
+
+    def tag_index(self) -> TagIndex:
+        if self._tag_index is None:
+            index = TagIndex()
+            store = self.store
+            for ordinal in range(len(store)):
+                index.add(ordinal, store.tags(ordinal))
+            self._tag_index = index
+        return self._tag_index
+
+    def prefix_index(self) -> PrefixIndex:
+        if self._prefix_index is None:
+            store = self.store
+            self._prefix_index = PrefixIndex.build(itertools.chain.from_iterable(
+                ((ordinal, store.video_id(ordinal)), (ordinal, store.title(ordinal)))
+                for ordinal in range(len(store))))
+        return self._prefix_index
+
+    def tag_bits(self, tag) -> int:
+        """Returns the bitset of the videos carrying tag, ignoring case, see tag_query."""
+        tag = tag.casefold()
+        bits = self._tag_bits.get(tag)
+        if bits is None:
+            bits = self._tag_bits[tag] = bits_from_ordinals(self.tag_index().lookup(tag), len(self))
+        return bits
+
+    def all_bits(self) -> int:
+        """Returns the bitset of every video, see tag_query."""
+        if self._all_bits is None:
+            self._all_bits = (1 << len(self)) - 1
+        return self._all_bits
+
+    def listing(self) -> SortedListing:
+        if self._listing is None:
+            # sorting every video would only churn the line cache
+            self._listing = SortedListing.build(self._format_line, range(len(self.store)))
+        return self._listing
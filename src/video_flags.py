@@ -0,0 +1,80 @@
+"""Flag state kept apart from the catalog it applies to."""
+
+
+class FlagOverlay:
+    """The flagged videos of a catalog, as a sparse ordinal -> reason map.
+
+    An overlay may sit on top of a parent overlay, such as one holding the
+    flags that apply to every session. It starts out seeing the parent's
+    flags and records only its own changes, so creating one is as cheap as
+    creating an empty dict and the parent is never written to. Changes made
+    to the parent later show through, except for videos the overlay flagged
+    or allowed itself.
+    """
+
+    __slots__ = ("_parent", "_changes", "_version")
+
+    def __init__(self, parent=None):
+        """
+        Args:
+            parent: The overlay whose flags this one starts out with.
+        """
+        self._parent = parent
+        self._changes = {}  # ordinal -> reason, or None where a parent's flag was lifted
+        self._version = 0  # bumped on every change
+
+    @property
+    def version(self) -> int:
+        """A number that changes whenever a flag of this overlay or its parents does."""
+        if self._parent is None:
+            return self._version
+        return self._version + self._parent.version
+
+    def __bool__(self):
+        """Returns whether any video is flagged."""
+        if self._parent is None:
+            return bool(self._changes)
+        return len(self) > 0
+
+    def __len__(self):
+        """Returns the number of flagged videos."""
+        if self._parent is None:
+            return len(self._changes)
+        count = len(self._parent)
+        for ordinal, reason in self._changes.items():
+            count += (reason is not None) - self._parent.flagged(ordinal)
+        return count
+
+    def __iter__(self):
+        """Yields the ordinals of the flagged videos, in no particular order."""
+        for ordinal, reason in self._changes.items():
+            if reason is not None:
+                yield ordinal
+        if self._parent is not None:
+            for ordinal in self._parent:
+                if ordinal not in self._changes:
+                    yield ordinal
+
+    def flagged(self, ordinal) -> bool:
+        reason = self._changes.get(ordinal, self)
+        if reason is self:  # not changed here
+            return self._parent is not None and self._parent.flagged(ordinal)
+        return reason is not None
+
+    def reason(self, ordinal) -> str:
+        """Returns the flag reason of a video, empty if it is not flagged."""
+        reason = self._changes.get(ordinal, self)
+        if reason is self:
+            return self._parent.reason(ordinal) if self._parent is not None else ""
+        return reason or ""
+
+    def flag(self, ordinal, reason=""):
+        self._changes[ordinal] = reason
+        self._version += 1
+
+    def allow(self, ordinal):
+        if self._parent is not None and self._parent.flagged(ordinal):
+            self._changes[ordinal] = None
+        else:
+            self._changes.pop(ordinal, None)
+        self._version += 1
@@ -0,0 +1,435 @@
+"""Search indexes and caches kept by a video library."""
+
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+import functools
+
+# the most trigram posting lists a search intersects
+_INTERSECTED_POSTINGS = 4
+
+
+class TitleIndex:
+    """An inverted index answering case-insensitive substring queries on titles.
+
+    Titles are casefolded and split into whitespace separated words; every
+    word has a posting list of the ordinals whose title contains it. To find
+    the words matching part of a query without scanning the vocabulary, all
+    suffixes of all words are kept sorted, so the words containing a fragment
+    are the suffixes starting with it, found by binary search.
+    """
+
+    def __init__(self):
+        self._postings = {}  # word -> ascending list of ordinals
+        self._suffixes = []  # sorted suffixes of every word
+        self._suffix_words = []  # (word, suffix offset), aligned with _suffixes
+
+    @classmethod
+    def build(cls, titles):
+        """Builds an index over (ordinal, title) pairs in ascending ordinal order.
+
+        Much faster than adding titles one by one, since the suffixes are
+        sorted once at the end instead of being inserted in order.
+        """
+        index = cls()
+        postings = index._postings
+        for ordinal, title in titles:
+            for word in set(title.casefold().split()):
+                word_postings = postings.get(word)
+                if word_postings is None:
+                    postings[word] = [ordinal]
+                else:
+                    word_postings.append(ordinal)
+        entries = sorted((word[offset:], word, offset)
+                         for word in postings for offset in range(len(word)))
+        index._suffixes = [suffix for suffix, _, _ in entries]
+        index._suffix_words = [(word, offset) for _, word, offset in entries]
+        return index
+
+    def add(self, ordinal, title):
+        for word in set(title.casefold().split()):
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = []
+                for offset in range(len(word)):
+                    position = bisect_left(self._suffixes, word[offset:])
+                    self._suffixes.insert(position, word[offset:])
+                    self._suffix_words.insert(position, (word, offset))
+            if not postings or postings[-1] < ordinal:
+                postings.append(ordinal)
+            else:
+                insort(postings, ordinal)
+
+    def remove(self, ordinal, title):
+        for word in set(title.casefold().split()):
+            postings = self._postings.get(word)
+            if postings is not None and ordinal in postings:
+                postings.remove(ordinal)
+
+    def _words(self, fragment, starts_word, ends_word):
+        """Yields the indexed words containing fragment, anchored as asked."""
+        if starts_word and ends_word:
+            if fragment in self._postings:
+                yield fragment
+            return
+        position = bisect_left(self._suffixes, fragment)
+        while position < len(self._suffixes) and self._suffixes[position].startswith(fragment):
+            word, offset = self._suffix_words[position]
+            if (not starts_word or offset == 0) and \
+                    (not ends_word or len(word) - offset == len(fragment)):
+                yield word
+            position += 1
+
+    def candidates(self, term):
+        """Returns the set of ordinals whose title may contain term.
+
+        Every title containing term is in the set, but not every title in it
+        contains term, so results must be checked against the actual titles.
+        Only the most selective fragment of the term is looked up, which
+        keeps the cost proportional to its postings rather than to the
+        catalog. Returns None when the term has no words to narrow the
+        search down with.
+        """
+        term = term.casefold()
+        fragments = term.split()
+        if not fragments:
+            return None
+        best = None
+        best_size = None
+        for i, fragment in enumerate(fragments):
+            # a fragment that is followed or preceded by whitespace in the
+            # term must end or start a word of the title
+            starts_word = i > 0 or term[0].isspace()
+            ends_word = i < len(fragments) - 1 or term[-1].isspace()
+            words = list(self._words(fragment, starts_word, ends_word))
+            size = sum(len(self._postings[word]) for word in words)
+            if best_size is None or size < best_size:
+                best, best_size = words, size
+                if size == 0:
+                    break
+        result = set()
+        for word in best:
+            result.update(self._postings[word])
+        return result
+
+
+class TrigramIndex:
+    """Posting lists of the titles containing each three character sequence.
+
+    Titles are casefolded first. A title containing a query contains every
+    trigram of the query, so intersecting their posting lists narrows a
+    search down to a few candidates, which are then checked against the
+    titles. Unlike the words of TitleIndex, trigrams also match across the
+    spaces of a title. Queries shorter than a trigram cannot be answered.
+    """
+
+    def __init__(self):
+        self._postings = {}  # trigram -> ascending array of ordinals
+
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @classmethod
+    def build(cls, titles):
+        """Builds an index over (ordinal, title) pairs in ascending ordinal order."""
+        index = cls()
+        postings = index._postings
+        for ordinal, title in titles:
+            for trigram in cls._trigrams(title.casefold()):
+                trigram_postings = postings.get(trigram)
+                if trigram_postings is None:
+                    postings[trigram] = array("I", (ordinal,))
+                else:
+                    trigram_postings.append(ordinal)
+        return index
+
+    def add(self, ordinal, title):
+        for trigram in self._trigrams(title.casefold()):
+            postings = self._postings.get(trigram)
+            if postings is None:
+                self._postings[trigram] = array("I", (ordinal,))
+            elif not postings or postings[-1] < ordinal:
+                postings.append(ordinal)
+            else:
+                position = bisect_left(postings, ordinal)
+                if position == len(postings) or postings[position] != ordinal:
+                    postings.insert(position, ordinal)
+
+    def remove(self, ordinal, title):
+        for trigram in self._trigrams(title.casefold()):
+            postings = self._postings.get(trigram, ())
+            position = bisect_left(postings, ordinal)
+            if position < len(postings) and postings[position] == ordinal:
+                del postings[position]
+
+    def candidates(self, term):
+        """Returns an iterator over the ascending ordinals whose title may contain term.
+
+        Every title containing term is included, but not every included
+        title contains it. The shortest posting list is walked and checked
+        against the next shortest ones by binary search, lazily, so a caller
+        that stops early pays only for the candidates it consumed. Returns
+        None when term is shorter than a trigram.
+        """
+        trigrams = self._trigrams(term.casefold())
+        if not trigrams:
+            return None
+        postings = sorted((self._postings.get(trigram, ()) for trigram in trigrams), key=len)
+        candidates = iter(postings[0])
+        # past a few lists, checking the titles is cheaper than more lookups
+        for other in postings[1:_INTERSECTED_POSTINGS]:
+            candidates = filter(functools.partial(_contains, other), candidates)
+        return candidates
+
+
+def _contains(postings, ordinal):
+    position = bisect_left(postings, ordinal)
+    return position < len(postings) and postings[position] == ordinal
+
+
+class TagIndex:
+    """Posting lists of the videos carrying each tag, ignoring case."""
+
+    def __init__(self):
+        self._postings = {}  # casefolded tag -> ascending list of ordinals
+
+    def add(self, ordinal, tags):
+        for tag in set(tag.casefold() for tag in tags):
+            postings = self._postings.get(tag)
+            if postings is None:
+                self._postings[tag] = [ordinal]
+            elif not postings or postings[-1] < ordinal:
+                postings.append(ordinal)
+            else:
+                position = bisect_left(postings, ordinal)
+                if position == len(postings) or postings[position] != ordinal:
+                    postings.insert(position, ordinal)
+
+    def remove(self, ordinal, tags):
+        for tag in set(tag.casefold() for tag in tags):
+            postings = self._postings.get(tag, ())
+            position = bisect_left(postings, ordinal)
+            if position < len(postings) and postings[position] == ordinal:
+                del postings[position]
+
+    def lookup(self, tag):
+        """Returns the ascending ordinals of the indexed videos carrying tag."""
+        return self._postings.get(tag.casefold(), ())
+
+
+class PrefixIndex:
+    """Casefolded keys, such as video ids and titles, kept sorted for prefix completion.
+
+    The keys starting with a prefix are a contiguous run of the sorted keys,
+    found by binary search, so completing costs the logarithm of the number
+    of keys plus the number of completions, whatever the catalog size. Two
+    parallel lists hold the (key, ordinal) entries in order, which takes far
+    less memory than a trie of per-character nodes.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._ordinals = []  # aligned with _keys
+
+    @classmethod
+    def build(cls, entries):
+        """Builds an index over (ordinal, key) pairs."""
+        index = cls()
+        pairs = sorted((key.casefold(), ordinal) for ordinal, key in entries)
+        index._keys = [key for key, _ in pairs]
+        index._ordinals = [ordinal for _, ordinal in pairs]
+        return index
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _position(self, key, ordinal):
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key \
+                and self._ordinals[position] < ordinal:
+            position += 1
+        return position
+
+    def add(self, ordinal, keys):
+        for key in keys:
+            key = key.casefold()
+            position = self._position(key, ordinal)
+            self._keys.insert(position, key)
+            self._ordinals.insert(position, ordinal)
+
+    def remove(self, ordinal, keys):
+        for key in keys:
+            key = key.casefold()
+            position = self._position(key, ordinal)
+            if position < len(self._keys) and self._keys[position] == key \
+                    and self._ordinals[position] == ordinal:
+                del self._keys[position]
+                del self._ordinals[position]
+
+    def complete(self, prefix, k):
+        """Returns up to k distinct ordinals with a key starting with prefix, in key order."""
+        prefix = prefix.casefold()
+        found = {}  # ordered set of ordinals
+        position = bisect_left(self._keys, prefix)
+        while len(found) < k and position < len(self._keys) \
+                and self._keys[position].startswith(prefix):
+            found[self._ordinals[position]] = None
+            position += 1
+        return list(found)
+
+
+class PlayableSet:
+    """The ordinals of the videos that may be played, packed densely.
+
+    Flagging a video swaps the last ordinal into its slot and allowing it
+    appends it again, so updates and uniform random picks are all O(1).
+    """
+
+    def __init__(self, ordinals=()):
+        self._ordinals = array("I", ordinals)
+        self._positions = array("I")  # ordinal -> its slot in _ordinals
+        for position, ordinal in enumerate(self._ordinals):
+            self._set_position(ordinal, position)
+
+    def _set_position(self, ordinal, position):
+        missing = ordinal + 1 - len(self._positions)
+        if missing > 0:
+            self._positions.frombytes(bytes(missing * self._positions.itemsize))
+        self._positions[ordinal] = position
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __contains__(self, ordinal):
+        if ordinal >= len(self._positions):
+            return False
+        position = self._positions[ordinal]
+        return position < len(self._ordinals) and self._ordinals[position] == ordinal
+
+    def add(self, ordinal):
+        if ordinal not in self:
+            self._set_position(ordinal, len(self._ordinals))
+            self._ordinals.append(ordinal)
+
+    def discard(self, ordinal):
+        if ordinal in self:
+            position = self._positions[ordinal]
+            last = self._ordinals.pop()
+            if last != ordinal:
+                self._ordinals[position] = last
+                self._positions[last] = position
+
+    def choice(self, rng):
+        """Returns a uniformly chosen ordinal using rng, None if the set is empty."""
+        if not self._ordinals:
+            return None
+        return self._ordinals[rng.randrange(len(self._ordinals))]
+
+
+class SortedListing:
+    """The ordinals of all videos in SHOW_ALL_VIDEOS order.
+
+    Videos are ordered by their 'title (video_id) [tags]' line. Video ids are
+    unique, so the flag suffix of a flagged video's line never decides the
+    order, and flagging or allowing a video leaves the listing untouched.
+    """
+
+    def __init__(self, key):
+        """
+        Args:
+            key: Returns the listing line of an ordinal.
+        """
+        self._key = key
+        self._ordinals = []
+
+    @classmethod
+    def build(cls, key, ordinals):
+        listing = cls(key)
+        listing._ordinals = sorted(ordinals, key=key)
+        return listing
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    # bisect only takes a key function from Python 3.10 on, so the listing
+    # is searched by hand, computing the line of every probed ordinal
+    def _position(self, line) -> int:
+        """Returns the position of the first ordinal listed under line or after it."""
+        ordinals, key = self._ordinals, self._key
+        low, high = 0, len(ordinals)
+        while low < high:
+            middle = (low + high) >> 1
+            if key(ordinals[middle]) < line:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def add(self, ordinal):
+        self._ordinals.insert(self._position(self._key(ordinal)), ordinal)
+
+    def remove(self, ordinal, key):
+        """Removes an ordinal that was listed under key."""
+        position = self._position(key)
+        while self._ordinals[position] != ordinal:
+            position += 1
+        del self._ordinals[position]
+
+    def page(self, offset=0, limit=None):
+        """Returns the listed ordinals from offset on, at most limit of them."""
+        end = None if limit is None else offset + limit
+        return self._ordinals[offset:end]
+
+
+class RenderCache:
+    """Remembers the rendered listing line of recently shown videos.
+
+    Holds at most capacity lines, dropping the least recently used one
+    first. The catalog invalidates a video's line whenever the video is
+    replaced.
+    """
+
+    def __init__(self, render, capacity=100000):
+        """
+        Args:
+            render: Returns the line of an ordinal.
+            capacity: The most lines kept at once.
+        """
+        self._render = render
+        self._capacity = capacity
+        self._lines = OrderedDict()  # ordinal -> line, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, ordinal) -> str:
+        line = self._lines.get(ordinal)
+        if line is not None:
+            self.hits += 1
+            self._lines.move_to_end(ordinal)
+            return line
+        self.misses += 1
+        line = self._lines[ordinal] = self._render(ordinal)
+        if len(self._lines) > self._capacity:
+            self._lines.popitem(last=False)
+        return line
+
+    def invalidate(self, ordinal):
+        if self._lines.pop(ordinal, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self._lines)
+        self._lines.clear()
+
+    def stats(self) -> dict:
+        """Returns the hit and miss counters, the hit rate and the number of cached lines."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._lines),
+        }
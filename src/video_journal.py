@@ -0,0 +1,238 @@
+"""An append-only journal keeping playlists and flags across runs.
+
+Every change is appended to the journal as one JSON line. Lines are written
+and fsynced by a background thread, a whole batch at a time, so a command
+never waits for the disk: the changes of all commands issued while one
+batch is being synced share the next fsync. From time to time the complete
+state is written to a snapshot and the journal starts over, so recovery
+only replays the changes made since the last snapshot.
+
+The journal starts with a header line holding the sequence number of the
+first change it holds; the snapshot holds the sequence number of the last
+change it covers, so the changes of a journal that was not yet restarted
+when the process stopped are not replayed twice.
+"""
+
+from pathlib import Path
+import json
+import os
+import threading
+
+# changes journaled between two snapshots
+DEFAULT_COMPACT_EVERY = 100000
+
+
+class JournalError(Exception):
+    """A class used to represent a journal that cannot be used."""
+    pass
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode() + b"\n"
+
+
+def _fsync_directory(path):
+    try:
+        directory = os.open(path.parent, os.O_RDONLY)
+    except OSError:  # directories cannot be opened on this platform
+        return
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def _write_atomically(path, data):
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    _fsync_directory(path)
+
+
+class Journal:
+    """An append-only log of changes with group commit and compaction."""
+
+    def __init__(self, path, compact_every=DEFAULT_COMPACT_EVERY):
+        """
+        Args:
+            path: The journal file. The snapshot is kept next to it, with
+                .snapshot appended to its name.
+            compact_every: How many changes are journaled before the state
+                is written to a new snapshot.
+        """
+        if compact_every < 1:
+            raise ValueError("compact_every must be a positive number")
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_name(self.path.name + ".snapshot")
+        self._compact_every = compact_every
+        self._condition = threading.Condition()
+        self._pending = []  # encoded changes, or compaction markers, not written yet
+        self._appended = 0  # sequence number of the last appended change
+        self._durable = 0  # sequence number of the last synced change
+        self._compacted = 0  # sequence number of the last change a snapshot covers
+        self._error = None  # what stopped the writer thread
+        self._closing = False
+        self._file = None
+        self._writer = None
+
+    def recover(self, restore, apply):
+        """Replays the snapshot and the journal, then opens the journal for appending.
+
+        A change that was only partly written when the process stopped is
+        dropped.
+
+        Args:
+            restore: Called with the state of the snapshot, if there is one.
+            apply: Called with every change made after the snapshot, in
+                order.
+
+        Returns:
+            The number of changes replayed from the journal.
+        """
+        if self._file is not None:
+            raise JournalError("The journal is already open")
+        sequence = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "rb") as snapshot:
+                try:
+                    content = json.load(snapshot)
+                except ValueError:
+                    raise JournalError(f"{self.snapshot_path} is not a journal snapshot")
+            restore(content["state"])
+            sequence = content["sequence"]
+        self._compacted = sequence
+
+        replayed = 0
+        valid_size = 0
+        if self.path.exists():
+            with open(self.path, "rb") as journal:
+                header = journal.readline()
+                if header.endswith(b"\n"):
+                    valid_size = len(header)
+                    line_sequence = json.loads(header)["start"]
+                    for line in journal:
+                        if not line.endswith(b"\n"):
+                            break  # torn write at the end
+                        try:
+                            change = json.loads(line)
+                        except ValueError:
+                            break
+                        valid_size += len(line)
+                        line_sequence += 1
+                        if line_sequence > sequence:
+                            apply(change)
+                            sequence = line_sequence
+                            replayed += 1
+        if valid_size:
+            self._file = open(self.path, "r+b")
+            self._file.truncate(valid_size)
+            self._file.seek(valid_size)
+        else:
+            _write_atomically(self.path, _encode({"start": sequence}))
+            self._file = open(self.path, "ab")
+        self._appended = self._durable = sequence
+        self._writer = threading.Thread(target=self._write_batches, name="journal-writer",
+                                        daemon=True)
+        self._writer.start()
+        return replayed
+
+    def append(self, change):
+        """Queues a change to be written; returns without waiting for the disk."""
+        encoded = _encode(change)
+        with self._condition:
+            self._check_open()
+            self._pending.append(encoded)
+            self._appended += 1
+            self._condition.notify()
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Returns whether enough changes were journaled since the last snapshot."""
+        return self._appended - self._compacted >= self._compact_every
+
+    def compact(self, state):
+        """Queues a snapshot of state, which must include every change appended so far.
+
+        The writer thread writes the snapshot and starts a new journal after
+        the changes queued before it.
+        """
+        encoded = _encode({"sequence": self._appended, "state": state})
+        with self._condition:
+            self._check_open()
+            self._pending.append((self._appended, encoded))
+            self._compacted = self._appended
+            self._condition.notify()
+
+    def sync(self):
+        """Waits until every change appended so far is on disk."""
+        with self._condition:
+            target = self._appended
+            while self._durable < target and self._error is None:
+                self._condition.wait()
+            if self._error is not None:
+                raise JournalError("Cannot write the journal") from self._error
+
+    def close(self):
+        """Writes out the remaining changes and closes the journal."""
+        if self._writer is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._writer.join()
+        self._writer = None
+        self._file.close()
+        if self._error is not None:
+            raise JournalError("Cannot write the journal") from self._error
+
+    def _check_open(self):
+        if self._error is not None:
+            raise JournalError("Cannot write the journal") from self._error
+        if self._writer is None or self._closing:
+            raise JournalError("The journal is not open, recover it first")
+
+    def _write_batches(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closing:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, []
+                last = self._appended
+            try:
+                self._write(batch)
+            except OSError as e:
+                with self._condition:
+                    self._error = e
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._durable = last
+                self._condition.notify_all()
+
+    def _write(self, batch):
+        lines = []
+        for item in batch:
+            if isinstance(item, bytes):
+                lines.append(item)
+                continue
+            # a compaction marker: finish the current journal, write the
+            # snapshot, then start a new journal after it
+            sequence, snapshot = item
+            self._sync_lines(lines)
+            lines = []
+            _write_atomically(self.snapshot_path, snapshot)
+            self._file.close()
+            _write_atomically(self.path, _encode({"start": sequence}))
+            self._file = open(self.path, "ab")
+        self._sync_lines(lines)
+
+    def _sync_lines(self, lines):
+        if lines:
+            self._file.write(b"".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
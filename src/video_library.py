@@ -1,75 +1,385 @@
 """A video library class."""
 
-from .video import Video
-from pathlib import Path
-import csv
+from .video_catalog import DEFAULT_CATALOG, DEFAULT_CHUNK_SIZE, VideoCatalog
+from .video_flags import FlagOverlay
+from .video_index import PlayableSet
+from .video_output import StdoutSink
+from .tag_query import evaluate, is_tag_query, iter_ordinals
+from .video_store import VideoView
+import itertools
+import os
+import sys
 
 
-# Helper Wrapper around CSV reader to strip whitespace from around
-# each item.
-def _csv_reader_with_strip(reader):
-    yield from ((item.strip() for item in line) for line in reader)
+class VideoLibrary:
+    """A class used to represent a Video Library.
 
+    A library is one user's view of a catalog: the videos come from a
+    VideoCatalog that may be shared with other libraries, while flags are
+    kept in a FlagOverlay of its own.
+    """
 
-class VideoLibrary:
-    """A class used to represent a Video Library."""
-
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
-        self._videos = {}  # contains video objects
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                    False,  # default flagged
-                    ""  # default flag reason
-                )
+    def __init__(self, source=DEFAULT_CATALOG, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                 snapshot=False, output=None, catalog=None, flags=None, shared=True, stats=None):
+        """The VideoLibrary class is initialized.
+
+        Args:
+            source: A path or open text file to load the catalog from. None
+                creates an empty library to be filled through ingest().
+            chunk_size: Number of rows parsed per ingest step.
+            progress: Optional callable receiving the number of videos
+                loaded so far after every chunk.
+            snapshot: Map a binary snapshot of a catalog path instead of
+                parsing it, compiling the snapshot first if it is missing or
+                stale. True keeps it next to the catalog, a path puts it
+                there instead. Falls back to parsing when the snapshot
+                cannot be written.
+            output: The sink messages are written to, standard output by
+                default.
+            catalog: The VideoCatalog to read from, instead of loading
+                source.
+            flags: The FlagOverlay to keep flags in, a new empty one by
+                default. Pass FlagOverlay(parent) to start from the flags of
+                parent without changing them.
+            shared: Read a catalog path through the catalog shared by the
+                whole process, loaded only once. Shared catalogs are
+                read-only, so add_video and ingest need shared=False.
+            stats: The Stats counting video lookups and the indexes
+                searches go through. None counts nothing.
+        """
+        self.output = output if output is not None else StdoutSink()
+        if catalog is None:
+            if source is None:
+                catalog = VideoCatalog()
+            elif shared and isinstance(source, (str, os.PathLike)):
+                catalog = VideoCatalog.shared(source, chunk_size, progress, snapshot)
+            else:
+                catalog = VideoCatalog.load(source, chunk_size, progress, snapshot)
+        self._catalog = catalog
+        self._store = catalog.store
+        self._flags = flags if flags is not None else FlagOverlay()
+        self._stats = stats
+        # allowed videos, only built for random picks once most videos are flagged
+        self._playable = None
+        self._playable_key = None  # (catalog size, flag version) _playable was built for
+
+    @property
+    def catalog(self) -> VideoCatalog:
+        return self._catalog
+
+    @property
+    def flags(self) -> FlagOverlay:
+        return self._flags
+
+    @property
+    def stats(self):
+        return self._stats
+
+    def ingest(self, source, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        """Loads a catalog into the library one chunk at a time.
+
+        This is a generator: each step parses at most chunk_size rows, adds
+        them to the library and yields the number of videos loaded so far,
+        so the caller decides when (and whether) to load the next chunk.
+
+        Args:
+            source: A path or open text file to load the catalog from.
+            chunk_size: Number of rows parsed per step.
+            progress: Optional callable receiving the running count.
+        """
+        return self._catalog.ingest(source, chunk_size, progress)
+
+    def add_video(self, title, video_id, tags):
+        """Adds a single video to the library, replacing any video with the same id.
+
+        A replaced video starts out unflagged.
+        """
+        ordinal = self._catalog.add(title, video_id, tags)
+        if self._flags.flagged(ordinal):
+            self._flags.allow(ordinal)
+
+    def __len__(self):
+        return len(self._store)
+
+    # the video properties read by VideoView
+    def video_id(self, ordinal) -> str:
+        return self._store.video_id(ordinal)
+
+    def title(self, ordinal) -> str:
+        return self._store.title(ordinal)
+
+    def tags(self, ordinal):
+        return self._store.tags(ordinal)
+
+    def flagged(self, ordinal) -> bool:
+        return self._flags.flagged(ordinal)
+
+    def flag_reason(self, ordinal) -> str:
+        return self._flags.reason(ordinal)
 
     def get_all_videos(self):
         """Returns all available video information from the video library."""
-        return list(self._videos.values())
+        return [VideoView(self, ordinal) for ordinal in range(len(self._store))]
 
-    def get_video(self, video_id) -> Video:
-        """Returns the video object (title, url, tags, flagged_status, flagged message) from the video library.
+    def get_video(self, video_id) -> VideoView:
+        """Returns the video view (title, url, tags, flagged_status, flagged message) from the video library.
 
         Args:
             video_id: The video url.
 
         Returns:
-            The Video object for the requested video_id. None if the video
+            The video view for the requested video_id. None if the video
             does not exist.
         """
-        return self._videos.get(video_id, None)
+        ordinal = self._store.ordinal(video_id)
+        if self._stats is not None:
+            self._stats.count("library.lookups")
+            if ordinal is None:
+                self._stats.count("library.lookup_misses")
+        if ordinal is None:
+            return None
+        return VideoView(self, ordinal)
+
+    def _title_matches(self, search_term):
+        """Yields the ordinals matching a title search, in library order."""
+        store = self._store
+        flags = self._flags
+        needle = search_term.casefold()
+        # terms of a trigram or more are narrowed down by their trigrams,
+        # shorter ones by the words of the titles
+        ordinals = self._catalog.trigram_index().candidates(search_term)
+        index = "trigram_index"
+        if ordinals is None:
+            candidates = self._catalog.title_index().candidates(search_term)
+            index = "word_index"
+            if candidates is None:
+                ordinals = range(len(store))
+                index = "scan"
+            elif len(candidates) * 8 > len(store):
+                # walking the library stops sooner than sorting many candidates
+                ordinals = (ordinal for ordinal in range(len(store)) if ordinal in candidates)
+            else:
+                ordinals = sorted(candidates)
+        if self._stats is not None:
+            self._stats.count("title_search." + index)
+        for ordinal in ordinals:
+            if not flags.flagged(ordinal) and needle in store.title(ordinal).casefold():
+                yield ordinal
+
+    def _tag_matches(self, video_tag):
+        """Yields the ordinals matching a tag search, in library order."""
+        if is_tag_query(video_tag):
+            if self._stats is not None:
+                self._stats.count("tag_search.expression")
+            catalog = self._catalog
+            ordinals = iter_ordinals(evaluate(video_tag, catalog.tag_bits, catalog.all_bits()))
+        else:
+            if self._stats is not None:
+                self._stats.count("tag_search.tag_index")
+            ordinals = self._catalog.tag_index().lookup(video_tag)
+        if not self._flags:
+            return iter(ordinals)
+        flagged = self._flags.flagged
+        return (ordinal for ordinal in ordinals if not flagged(ordinal))
+
+    def _page(self, ordinals, offset, limit):
+        # islice takes no stop beyond sys.maxsize
+        end = None if limit is None else min(offset + limit, sys.maxsize)
+        return [VideoView(self, ordinal) for ordinal in itertools.islice(ordinals, offset, end)]
+
+    def search_titles(self, search_term, offset=0, limit=None):
+        """Returns the videos that are not flagged and whose title contains search_term.
+
+        The search ignores case and returns videos in library order. It
+        stops as soon as the requested page is complete.
+
+        Args:
+            search_term: The text to look for in titles.
+            offset: How many matching videos to skip.
+            limit: The most videos to return, all remaining ones if None.
+        """
+        return self._page(self._title_matches(search_term), offset, limit)
+
+    def search_tag(self, video_tag, offset=0, limit=None):
+        """Returns the videos that are not flagged and carry video_tag, ignoring case.
+
+        Raises TagQueryError if video_tag is an expression that cannot be
+        parsed.
+
+        Args:
+            video_tag: The tag to look for, or an expression of tags, see
+                tag_query.
+            offset: How many matching videos to skip.
+            limit: The most videos to return, all remaining ones if None.
+        """
+        return self._page(self._tag_matches(video_tag), offset, limit)
+
+    def complete(self, prefix, k=10):
+        """Returns up to k videos whose id or title starts with prefix, ignoring case.
+
+        Videos are ordered by the id or title that matched. Flagged videos
+        are included, so their ids can still be completed for ALLOW_VIDEO.
+
+        Args:
+            prefix: The start of a video id or title.
+            k: The most videos to return.
+        """
+        if self._stats is not None:
+            self._stats.count("complete.prefix_index")
+        return [VideoView(self, ordinal)
+                for ordinal in self._catalog.prefix_index().complete(prefix, k)]
+
+    def get_video_info_string(self, video: VideoView) -> str:
+        """Returns the line a video is listed with, flag included.
+
+        The line without the flag comes from the cache of the catalog.
+        """
+        ordinal = video.ordinal
+        line = self._catalog.line(ordinal)
+        if self._flags.flagged(ordinal):
+            line += " - FLAGGED (reason: " + self._flags.reason(ordinal) + ")"
+        return line
+
+    def render_cache_stats(self) -> dict:
+        """Returns the counters of the catalog's line cache, see RenderCache.stats."""
+        return self._catalog.line_cache_stats()
+
+    def get_sorted_videos(self, offset=0, limit=None):
+        """Yields videos in listing order: by title, then id, then tags.
+
+        Args:
+            offset: How many videos to skip from the start of the listing.
+            limit: The most videos to yield, all remaining ones if None.
+        """
+        for ordinal in self._catalog.listing().page(offset, limit):
+            yield VideoView(self, ordinal)
+
+    def _get_playable(self) -> PlayableSet:
+        key = (len(self._store), self._flags.version)
+        if self._playable_key != key:
+            if self._stats is not None:
+                self._stats.count("random.playable_rebuilds")
+            flagged = self._flags.flagged
+            self._playable = PlayableSet(
+                ordinal for ordinal in range(len(self._store)) if not flagged(ordinal))
+            self._playable_key = key
+        return self._playable
+
+    def number_of_allowed_videos(self) -> int:
+        """Returns how many videos are not flagged."""
+        return len(self._store) - len(self._flags)
+
+    def random_video(self, rng) -> VideoView:
+        """Returns a video that is not flagged, chosen uniformly with rng.
+
+        As long as at most half of the videos are flagged, ordinals are drawn
+        until one is not flagged, two draws on average, and no set of
+        playable videos is built. Past that the set is built, and it is no
+        larger than the flags the library already keeps.
+
+        Args:
+            rng: A random.Random instance.
+
+        Returns:
+            The chosen video view, None if every video is flagged.
+        """
+        size = len(self._store)
+        flags = self._flags
+        if not flags:
+            if not size:
+                return None
+            return VideoView(self, rng.randrange(size))
+        if len(flags) * 2 <= size:
+            while True:
+                ordinal = rng.randrange(size)
+                if not flags.flagged(ordinal):
+                    return VideoView(self, ordinal)
+        ordinal = self._get_playable().choice(rng)
+        if ordinal is None:
+            return None
+        return VideoView(self, ordinal)
+
+    def _set_flags(self, changes):
+        """Flags videos, or allows them where the reason is None, keeping the playable set current.
+
+        Args:
+            changes: (ordinal, reason) pairs.
+        """
+        playable_current = self._playable_key == (len(self._store), self._flags.version)
+        for ordinal, reason in changes:
+            if reason is None:
+                self._flags.allow(ordinal)
+            else:
+                self._flags.flag(ordinal, reason)
+            # a set that was already stale is rebuilt on its next use instead
+            if playable_current:
+                if reason is None:
+                    self._playable.add(ordinal)
+                else:
+                    self._playable.discard(ordinal)
+        if playable_current:
+            self._playable_key = (len(self._store), self._flags.version)
+
+    def _moderate(self, items, flag):
+        changes = []
+        summary = {"changed": [], "unchanged": [], "missing": []}
+        seen = set()  # ordinals changed by this batch
+        for video_id, reason in items:
+            ordinal = self._store.ordinal(video_id)
+            if ordinal is None:
+                summary["missing"].append(video_id)
+            elif ordinal in seen or self._flags.flagged(ordinal) == flag:
+                summary["unchanged"].append(video_id)
+            else:
+                seen.add(ordinal)
+                changes.append((ordinal, reason if flag else None))
+                summary["changed"].append(video_id)
+        self._set_flags(changes)
+        return summary
+
+    def flag_videos(self, items) -> dict:
+        """Flags many videos in one pass, without printing anything.
+
+        Args:
+            items: (video_id, reason) pairs.
+
+        Returns:
+            The ids of the videos that were flagged ("changed"), that were
+            already flagged ("unchanged") and that do not exist ("missing").
+            An id given twice counts as unchanged the second time.
+        """
+        return self._moderate(items, True)
+
+    def allow_videos(self, video_ids) -> dict:
+        """Removes the flags of many videos in one pass, without printing anything.
+
+        Returns:
+            The summary of flag_videos, "unchanged" holding the videos that
+            were not flagged.
+        """
+        return self._moderate(((video_id, None) for video_id in video_ids), False)
 
     # return True on success
     def flag_video(self, video_id, reason=""):
         video = self.get_video(video_id)
         if video:
             if video.flagged is True:
-                print("Cannot flag video: Video is already flagged")
+                self.output.print("Cannot flag video: Video is already flagged")
                 return False
             else:  # if video is not flagged yet
-                video._flagged = True
-                video._flag_reason = reason
+                self._set_flags(((video.ordinal, reason),))
                 return True
         else:  # if video nonexistent
-            print("Cannot flag video: Video does not exist")
+            self.output.print("Cannot flag video: Video does not exist")
 
     def allow_video(self, video_id):
         video = self.get_video(video_id)
         if video:
             if video.flagged is False:
-                print("Cannot remove flag from video: Video is not flagged")
+                self.output.print("Cannot remove flag from video: Video is not flagged")
                 return False
             else:  # if video is already flagged
-                video._flagged = False
-                video._flag_reason = ""
+                self._set_flags(((video.ordinal, None),))
                 return True
         else:  # if video nonexistent
-            print("Cannot remove flag from video: Video does not exist")
-
+            self.output.print("Cannot remove flag from video: Video does not exist")
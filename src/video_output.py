@@ -0,0 +1,72 @@
+"""Output sinks the video player writes its messages to."""
+
+import sys
+
+
+class StdoutSink:
+    """Writes every message straight to the current standard output."""
+
+    def print(self, message):
+        print(message)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class BufferedSink:
+    """Collects messages and writes them to a stream in bulk.
+
+    Messages are written once capacity of them are waiting, or when flush()
+    is called; callers must flush before waiting for user input.
+    """
+
+    def __init__(self, stream=None, capacity=1024):
+        """
+        Args:
+            stream: Where to write, the current standard output by default.
+            capacity: How many messages to hold before writing them out.
+        """
+        self._stream = stream
+        self._capacity = capacity
+        self._lines = []
+
+    def print(self, message):
+        self._lines.append(str(message))
+        if len(self._lines) >= self._capacity:
+            self.flush()
+
+    def flush(self):
+        stream = self._stream if self._stream is not None else sys.stdout
+        if self._lines:
+            self._lines.append("")  # end the last line too
+            stream.write("\n".join(self._lines))
+            self._lines = []
+        stream.flush()
+
+
+class CollectingSink:
+    """Keeps messages in memory until they are taken."""
+
+    def __init__(self):
+        self.lines = []
+
+    def print(self, message):
+        self.lines.append(str(message))
+
+    def flush(self):
+        pass
+
+    def take(self):
+        """Returns the messages collected so far and forgets them."""
+        lines, self.lines = self.lines, []
+        return lines
+
+
+class NullSink:
+    """Discards every message."""
+
+    def print(self, message):
+        pass
+
+    def flush(self):
+        pass
@@ -1,20 +1,98 @@
 """A video player class."""
 
+from .tag_query import TagQueryError
 from .video_library import VideoLibrary
 from .video_playlist import Playlist
 import random
-import sys, os
 
 
 class VideoPlayer:
     """A class used to represent a Video Player."""
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
+    def __init__(self, video_library=None, output=None, rng=None, prompt=None, journal=None,
+                 interactive=True):
+        """
+        Args:
+            video_library: The library to play from, the bundled catalog by
+                default.
+            output: The sink messages are written to. Defaults to the sink
+                of the given library, or to standard output.
+            rng: The random.Random used by PLAY_RANDOM; pass a seeded one
+                for reproducible runs.
+            prompt: Called without arguments to read the answer to the
+                play question after a search, input() by default.
+            journal: A Journal keeping playlists and flags across runs.
+                Its changes are replayed first, then every later change is
+                appended to it.
+            interactive: Ask whether to play one of the results right
+                after a search. A player that is not interactive never
+                waits for an answer; results are played with PLAY_RESULT.
+        """
+        if video_library is None:
+            video_library = VideoLibrary(output=output)
+        self._video_library = video_library
+        self._output = output if output is not None else video_library.output
         self._current_video_id = None  # the video_id of the playing Video object, is a string
         self._video_paused = False  # Boolean status variable indicating whether current video is paused
-        self._playlists = []  # is a List<Playlist>
-        self._number_of_allowed_videos = len(self._video_library.get_all_videos())
+        self._playlists = {}  # casefolded playlist name -> Playlist
+        # players not given a generator share the one of the random module
+        self._random = rng if rng is not None else random
+        self._prompt = prompt
+        self._interactive = interactive
+        self._last_results = (0, [])  # (offset, videos) of the last search page
+        self._journal = journal
+        if journal is not None:
+            journal.recover(self._restore, self._apply)
+
+    # journals a change made by a command, writing a snapshot when one is due
+    def _record(self, *change):
+        if self._journal is not None:
+            self._journal.append(change)
+            if self._journal.needs_compaction:
+                self._journal.compact(self._state())
+
+    # returns the playlists and flags as a snapshot of the journal
+    def _state(self):
+        library = self._video_library
+        return {
+            "playlists": [[playlist.get_name(), list(playlist.get_videos())]
+                          for playlist in self._playlists.values()],
+            "flags": [[library.video_id(ordinal), library.flag_reason(ordinal)]
+                      for ordinal in library.flags],
+        }
+
+    # restores the playlists and flags of a journal snapshot, silently
+    def _restore(self, state):
+        for name, video_ids in state["playlists"]:
+            playlist = self._playlists[name.casefold()] = Playlist(name)
+            for video_id in video_ids:
+                playlist.add_video(video_id)
+        self._video_library.flag_videos(state["flags"])
+
+    # replays one journaled change, silently
+    def _apply(self, change):
+        action, *arguments = change
+        # videos gone from the catalog since are skipped by the batch calls
+        if action == "flag":
+            self._video_library.flag_videos([arguments])
+        elif action == "allow":
+            self._video_library.allow_videos(arguments)
+        elif action == "flag_videos":
+            self._video_library.flag_videos(arguments[0])
+        elif action == "allow_videos":
+            self._video_library.allow_videos(arguments[0])
+        elif action == "create":
+            self._playlists[arguments[0].casefold()] = Playlist(arguments[0])
+        elif action == "delete":
+            self._playlists.pop(arguments[0].casefold(), None)
+        else:
+            playlist = self.get_playlist(arguments[0])
+            if action == "add":
+                playlist.add_video(arguments[1])
+            elif action == "remove":
+                playlist.remove_videos(arguments[1:])
+            elif action == "clear":
+                playlist.clear()
 
     # return video_title given video_id, none if invalid id
     def get_title(self, video_id):
@@ -31,29 +109,13 @@ class VideoPlayer:
         currentVideoInfo = self._video_library.get_video(video_id)
         return currentVideoInfo.tags
 
-    # get the index of given name in self._playlists
-    def get_playlist_index(self, playlist_name):
-        for playlist in self._playlists:
-            if playlist_name.upper() == playlist.get_name().upper():
-                return self._playlists.index(playlist)
-        return None
-
-    # returns a playlist object
+    # returns a playlist object given its name in any case, None if it does not exist
     def get_playlist(self, playlist_name):
-        index = self.get_playlist_index(playlist_name)
-        return self._playlists[index]
+        return self._playlists.get(playlist_name.casefold())
 
     # return a string representation of a video
     def get_video_info_string(self, video_id):
-        video = self._video_library.get_video(video_id)
-        tag_string = ""
-        for tag in video.tags:
-            tag_string += tag + " "
-        tag_string = tag_string.strip()
-        result = video.title + " (" + video.video_id + ") [" + tag_string + "]"
-        if video.flagged:
-            result = result + " - FLAGGED " + "(reason: " + video.flag_reason + ")"
-        return result
+        return self._video_library.get_video_info_string(self._video_library.get_video(video_id))
 
     # returns printable format of flag reason, (reason: Not supplied) for empty reason
     def get_flag_reason(self, video_id) -> str:
@@ -63,40 +125,33 @@ class VideoPlayer:
         else:
             return "(reason: " + video.flag_reason + ")"
 
-    @staticmethod
-    def block_print():
-        sys.stdout = open(os.devnull, 'w')
-
-    @staticmethod
-    def enable_print():
-        sys.stdout = sys.__stdout__
+    @property
+    def output(self):
+        """Returns the sink messages are written to."""
+        return self._output
 
     def number_of_allowed_videos(self) -> int:
-        return self._number_of_allowed_videos
-
-    def increment_number_of_allowed_videos(self):
-        self._number_of_allowed_videos += 1
-
-    def decrement_number_of_allowed_videos(self):
-        self._number_of_allowed_videos -= 1
+        return self._video_library.number_of_allowed_videos()
 
     # ------------------------ ↑ customised functions ↑ -----------------------------
 
     def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos())
-        print(f"{num_videos} videos in the library")
-
-    def show_all_videos(self):
-        """Returns all videos."""
-        videoList = []
-        print("Here's a list of all available videos:")
-        all_videos = self._video_library.get_all_videos()
-        for video in all_videos:
-            video_string = self.get_video_info_string(video.video_id)
-            videoList.append(video_string)
-        videoList = sorted(videoList)
-        for videoInfo in videoList:
-            print(videoInfo)
+        num_videos = len(self._video_library)
+        self._output.print(f"{num_videos} videos in the library")
+
+    def show_all_videos(self, offset=0, limit=None):
+        """Returns all videos.
+
+        Args:
+            offset: How many videos of the sorted listing to skip.
+            limit: The most videos to show, all remaining ones if None.
+        """
+        self._output.print("Here's a list of all available videos:")
+        for video in self._video_library.get_sorted_videos(offset, limit):
+            self._output.print(self._video_library.get_video_info_string(video))
+        if limit is not None and offset + limit < len(self._video_library):
+            self._output.print(f"There are more videos, enter SHOW_ALL_VIDEOS OFFSET "
+                               f"{offset + limit} to see them.")
 
     def play_video(self, video_id):
         """Plays the respective video.
@@ -106,11 +161,11 @@ class VideoPlayer:
         """
         currentVideoInfo = self._video_library.get_video(video_id)
         if currentVideoInfo is None:  # if input is an invalid id
-            print("Cannot play video: Video does not exist")
+            self._output.print("Cannot play video: Video does not exist")
         else:  # if a valid video_id is input
             if currentVideoInfo.flagged:
                 reason = self.get_flag_reason(video_id)
-                print("Cannot play video: Video is currently flagged "+reason)
+                self._output.print("Cannot play video: Video is currently flagged "+reason)
                 return
             if self._video_paused:
                 self.stop_video()
@@ -119,58 +174,54 @@ class VideoPlayer:
                 self.stop_video()
             self._current_video_id = video_id
             currentVideoTitle = currentVideoInfo.title
-            print("Playing video: " + currentVideoTitle)
+            self._output.print("Playing video: " + currentVideoTitle)
 
     def stop_video(self):
         """Stops the current video."""
         if self._current_video_id is None:
-            print("Cannot stop video: No video is currently playing")
+            self._output.print("Cannot stop video: No video is currently playing")
         else:
             currentVideoTitle = self.get_title(self._current_video_id)
-            print("Stopping video: " + currentVideoTitle)
+            self._output.print("Stopping video: " + currentVideoTitle)
             self._current_video_id = None
+            self._video_paused = False
 
     def play_random_video(self):
         """Plays a random video from the video library."""
-        VideoList = self._video_library.get_all_videos()
-        VideoIDList = []
-        for elem in VideoList:
-            VideoIDList.append(elem.video_id)
-        randomVideoID = random.choice(VideoIDList)
-        if self.number_of_allowed_videos() == 0:
-            print("No videos available")
-            return
+        video = self._video_library.random_video(self._random)
+        if video is None:  # every video is flagged
+            self._output.print("No videos available")
         else:
-            self.play_video(randomVideoID)
+            self.play_video(video.video_id)
 
     def pause_video(self):
         """Pauses the current video."""
 
         if self._video_paused:
             title = self.get_title(self._current_video_id)
-            print("Video already paused: " + title)
+            self._output.print("Video already paused: " + title)
         elif self._current_video_id is None:
-            print("Cannot pause video: No video is currently playing")
+            self._output.print("Cannot pause video: No video is currently playing")
         else:
             self._video_paused = True
             title = self.get_title(self._current_video_id)
-            print("Pausing video: " + title)
+            self._output.print("Pausing video: " + title)
 
     def continue_video(self):
         """Resumes playing the current video."""
         if self._current_video_id is None:
-            print("Cannot continue video: No video is currently playing")
+            self._output.print("Cannot continue video: No video is currently playing")
         elif not self._video_paused:
-            print("Cannot continue video: Video is not paused")
+            self._output.print("Cannot continue video: Video is not paused")
         else:
             self._video_paused = False
-            print("Continuing video: " + self.get_title(self._current_video_id))
+            self._output.print("Continuing video: " + self.get_title(self._current_video_id))
 
     def show_playing(self):
         """Displays video currently playing."""
         title = self.get_title(self._current_video_id)
         if title is None:
-            print("No video is currently playing")
+            self._output.print("No video is currently playing")
         else:
             id = self._current_video_id
             tagS = ""
@@ -181,7 +232,7 @@ class VideoPlayer:
             message = "Currently playing: " + title + " (" + id + ") [" + tagS + "]"
             if self._video_paused:
                 message += " - PAUSED"
-            print(message)
+            self._output.print(message)
 
     def create_playlist(self, playlist_name):
         """Creates a playlist with a given name.
@@ -189,15 +240,14 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        NAME = playlist_name.upper()  # capitalised name for uniformity
-        # comparison of newPlaylist with all existing playlists
-        for elem in self._playlists:
-            if elem.name.upper() == NAME:
-                print("Cannot create playlist: A playlist with the same name already exists")
-                return None
+        key = playlist_name.casefold()  # playlist names ignore case
+        if key in self._playlists:
+            self._output.print("Cannot create playlist: A playlist with the same name already exists")
+            return None
         newPlaylist = Playlist(playlist_name)
-        print("Successfully created new playlist: " + playlist_name)
-        self._playlists.append(newPlaylist)
+        self._output.print("Successfully created new playlist: " + playlist_name)
+        self._playlists[key] = newPlaylist
+        self._record("create", playlist_name)
 
     def add_to_playlist(self, playlist_name, video_id):
         """Adds a video to a playlist with a given name.
@@ -206,35 +256,35 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be added.
         """
-        playlistIndex = self.get_playlist_index(playlist_name)
-        if playlistIndex is None:
+        playlist = self.get_playlist(playlist_name)
+        if playlist is None:
             # Playlist with the input name is not found
-            print("Cannot add video to " + playlist_name + ": Playlist does not exist")
+            self._output.print("Cannot add video to " + playlist_name + ": Playlist does not exist")
         elif self.get_title(video_id) is None:
-            print("Cannot add video to " + playlist_name + ": Video does not exist")
+            self._output.print("Cannot add video to " + playlist_name + ": Video does not exist")
         elif self.get_video(video_id).flagged:
-            print("Cannot add video to " + playlist_name + ": Video is currently flagged " + self.get_flag_reason(video_id))
+            self._output.print("Cannot add video to " + playlist_name + ": Video is currently flagged " + self.get_flag_reason(video_id))
             return
         else:
-            playlist = self._playlists[playlistIndex]
-            if video_id in playlist.get_videos():
-                print("Cannot add video to " + playlist_name + ": Video already added")
+            if video_id in playlist:
+                self._output.print("Cannot add video to " + playlist_name + ": Video already added")
             else:
                 playlist.add_video(video_id)
-                print("Added video to " + playlist_name + ": " + self.get_title(video_id))
+                self._record("add", playlist_name, video_id)
+                self._output.print("Added video to " + playlist_name + ": " + self.get_title(video_id))
 
     def show_all_playlists(self):
         """Display all playlists."""
         playlistDisplay = []
-        for playlist in self._playlists:
+        for playlist in self._playlists.values():
             playlistDisplay.append(playlist.get_name())
         if not playlistDisplay:
             # if no playlists, no playlist to show - test_show_all_playlists_no_playlists_exist
-            print("No playlists exist yet")
+            self._output.print("No playlists exist yet")
         else:
-            print("Showing all playlists:")
+            self._output.print("Showing all playlists:")
             for elem in sorted(playlistDisplay):
-                print(elem)
+                self._output.print(elem)
 
     def show_playlist(self, playlist_name):
         """Display all videos in a playlist with a given name.
@@ -242,36 +292,42 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        playlist_index = self.get_playlist_index(playlist_name)
-        if playlist_index is None:  # Playlist with the input name is not found
-            print("Cannot show playlist " + playlist_name + ": Playlist does not exist")
+        playlist = self.get_playlist(playlist_name)
+        if playlist is None:  # Playlist with the input name is not found
+            self._output.print("Cannot show playlist " + playlist_name + ": Playlist does not exist")
         else:
-            print("Showing playlist: " + playlist_name)
-            playlist = self._playlists[playlist_index]
+            self._output.print("Showing playlist: " + playlist_name)
             video_ids = playlist.get_videos()
             if len(video_ids) == 0:  # no videos in videos[]
-                print("No videos here yet")
+                self._output.print("No videos here yet")
             else:
                 for video_id in video_ids:
-                    print(self.get_video_info_string(video_id))
+                    self._output.print(self.get_video_info_string(video_id))
 
-    def remove_from_playlist(self, playlist_name, video_id):
-        """Removes a video to a playlist with a given name.
+    def remove_from_playlist(self, playlist_name, *video_ids):
+        """Removes videos from a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
-            video_id: The video_id to be removed.
+            video_ids: The video_ids to be removed.
         """
-        playlist_index = self.get_playlist_index(playlist_name)
-        if playlist_index is None:
+        playlist = self.get_playlist(playlist_name)
+        if playlist is None:
             # Playlist with the input name is not found
-            print("Cannot remove video from " + playlist_name + ": Playlist does not exist")
-        else:
-            playlist = self.get_playlist(playlist_name)
-            if self.get_title(video_id) is None:
-                print("Cannot remove video from " + playlist_name + ": Video does not exist")
-            elif playlist.remove_video(video_id):
-                print("Removed video from " + playlist_name + ": " + self.get_title(video_id))
+            self._output.print("Cannot remove video from " + playlist_name + ": Playlist does not exist")
+            return
+        titles = {video_id: self.get_title(video_id) for video_id in video_ids}
+        removed = playlist.remove_videos(video_id for video_id, title in titles.items() if title is not None)
+        if removed:
+            self._record("remove", playlist_name, *removed)
+        for video_id in video_ids:
+            if titles[video_id] is None:
+                self._output.print("Cannot remove video from " + playlist_name + ": Video does not exist")
+            elif video_id in removed:
+                removed.discard(video_id)  # an id given twice is only removed once
+                self._output.print("Removed video from " + playlist_name + ": " + titles[video_id])
+            else:
+                self._output.print("Cannot remove video from " + playlist_name + ": Video is not in playlist")
 
     def clear_playlist(self, playlist_name):
         """Removes all videos from a playlist with a given name.
@@ -279,17 +335,14 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        playlist_index = self.get_playlist_index(playlist_name)
-        if playlist_index is None:
+        playlist = self.get_playlist(playlist_name)
+        if playlist is None:
             # Playlist with the input name is not found
-            print("Cannot clear playlist " + playlist_name + ": Playlist does not exist")
+            self._output.print("Cannot clear playlist " + playlist_name + ": Playlist does not exist")
             return
-        playlist = self.get_playlist(playlist_name)
-        self.block_print()
-        for video_id in playlist.videos:
-            self.remove_from_playlist(playlist_name, video_id)
-        self.enable_print()
-        print('Successfully removed all videos from ' + playlist_name)
+        playlist.clear()
+        self._record("clear", playlist_name)
+        self._output.print('Successfully removed all videos from ' + playlist_name)
 
     def delete_playlist(self, playlist_name):
         """Deletes a playlist with a given name.
@@ -297,79 +350,124 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        playlist_index = self.get_playlist_index(playlist_name)
-        if playlist_index is None:
-            print('Cannot delete playlist ' + playlist_name + ': Playlist does not exist')
+        if self._playlists.pop(playlist_name.casefold(), None) is None:
+            self._output.print('Cannot delete playlist ' + playlist_name + ': Playlist does not exist')
         else:
-            self._playlists.pop(playlist_index)
-            print('Deleted playlist: ' + playlist_name)
+            self._record("delete", playlist_name)
+            self._output.print('Deleted playlist: ' + playlist_name)
 
-    def search_videos(self, search_term):
-        """Display all the videos whose titles contain the search_term.
+    def find_videos(self, search_term, offset=0, limit=None):
+        """Returns one page of the videos whose titles contain search_term.
+
+        Prints nothing and asks nothing. The page becomes the last result
+        set, which play_result picks from.
 
         Args:
             search_term: The query to be used in search.
+            offset: How many matching videos to skip.
+            limit: The most videos to return, all remaining ones if None.
         """
-        all_videos = self._video_library.get_all_videos()
-        matching_video_ids = []
-        # populate matching_video_ids
-        for video in all_videos:
-            if video.flagged:
-                continue
-            index = video.title.upper().find(search_term.upper())
-            # index = -1 if value not found
-            if index != -1:
-                matching_video_ids.append(video.video_id)
-        if len(matching_video_ids) == 0:
-            print('No search results for ' + search_term)
-            return
+        return self._remember_results(
+            offset, self._video_library.search_titles(search_term, offset, limit))
+
+    def find_videos_tag(self, video_tag, offset=0, limit=None):
+        """Returns one page of the videos carrying video_tag, see find_videos."""
+        return self._remember_results(
+            offset, self._video_library.search_tag(video_tag, offset, limit))
+
+    def _remember_results(self, offset, videos):
+        self._last_results = (offset, videos)
+        return videos
+
+    def play_result(self, number):
+        """Plays a video of the last result set by the number it was shown with.
+
+        Args:
+            number: The result number, counted from the first match.
+        """
+        offset, videos = self._last_results
+        if not videos:
+            self._output.print("Cannot play result: There are no search results to play")
+        elif not offset < number <= offset + len(videos):
+            self._output.print(f"Cannot play result: There is no result number {number}")
         else:
-            print('Here are the results for ' + search_term + ':')
-            for i in range(len(matching_video_ids)):
-                print(str(i + 1) + ") " + self.get_video_info_string(matching_video_ids[i]))
-            try:
-                print("Would you like to play any of the above? If yes, specify the number of the video.")
-                print("If your answer is not a valid number, we will assume it's a no.")
-                response = input()
-                if int(response) <= len(matching_video_ids):
-                    video_id_to_play = matching_video_ids[int(response) - 1]
-                    self.play_video(video_id_to_play)
-            except ValueError:
-                return
+            self.play_video(videos[number - offset - 1].video_id)
 
-            # for i, video_id in enumerate(matching_video_ids):
-            #     print(str(i)+") " + self.get_video_info_string(video_id))
+    def complete(self, prefix, k=10):
+        """Displays up to k videos whose id or title starts with prefix.
+
+        The completions become the last result set, so PLAY_RESULT plays
+        one of them.
+
+        Args:
+            prefix: The start of a video id or title.
+            k: The most completions to show.
+        """
+        videos = self._remember_results(0, self._video_library.complete(prefix, k))
+        if not videos:
+            self._output.print("No completions for " + prefix)
+            return
+        self._output.print("Completions for " + prefix + ":")
+        for i, video in enumerate(videos, 1):
+            self._output.print(str(i) + ") " + self._video_library.get_video_info_string(video))
+
+    def search_videos(self, search_term, offset=0, limit=None):
+        """Display all the videos whose titles contain the search_term.
+
+        Args:
+            search_term: The query to be used in search.
+            offset: How many matching videos to skip.
+            limit: The most videos to show, all remaining ones if None.
+        """
+        self._show_search_results(search_term, self.find_videos, offset, limit)
 
-    def search_videos_tag(self, video_tag):
+    def search_videos_tag(self, video_tag, offset=0, limit=None):
         """Display all videos whose tags contains the provided tag.
 
         Args:
-            video_tag: The video tag to be used in search.
+            video_tag: The video tag to be used in search, or an expression
+                of tags such as "#cat AND #animal NOT #google".
+            offset: How many matching videos to skip.
+            limit: The most videos to show, all remaining ones if None.
         """
-        all_videos = self._video_library.get_all_videos()
-        matching_video_ids = []
-        # populate matching_video_ids
-        for video in all_videos:
-            if video.flagged:
-                continue
-            if video_tag in video.tags:
-                matching_video_ids.append(video.video_id)
-        if len(matching_video_ids) == 0:
-            print('No search results for ' + video_tag)
+        try:
+            self._show_search_results(video_tag, self.find_videos_tag, offset, limit)
+        except TagQueryError as e:
+            self._output.print("Cannot search tags: " + str(e))
+
+    # numbers one page of matching videos and offers to play one of them;
+    # numbers count from the first match, not from the start of the page
+    def _show_search_results(self, search_term, find, offset, limit):
+        # one more video than asked for tells whether there is a next page
+        matching_videos = find(search_term, offset, None if limit is None else limit + 1)
+        more = limit is not None and len(matching_videos) > limit
+        if more:
+            del matching_videos[limit:]
+        if len(matching_videos) == 0:
+            if offset:
+                self._output.print('No more search results for ' + search_term)
+            else:
+                self._output.print('No search results for ' + search_term)
+            return
+        self._output.print('Here are the results for ' + search_term + ':')
+        for i, video in enumerate(matching_videos, offset + 1):
+            self._output.print(str(i) + ") " + self._video_library.get_video_info_string(video))
+        if more:
+            self._output.print(f"There are more results, search again with OFFSET "
+                               f"{offset + limit} to see them.")
+        if not self._interactive:
+            self._output.print("To play one of the above, enter PLAY_RESULT and its number.")
+            return
+        try:
+            self._output.print("Would you like to play any of the above? If yes, specify the number of the video.")
+            self._output.print("If your answer is not a valid number, we will assume it's a no.")
+            self._output.flush()  # the question must be shown before waiting
+            response = self._prompt() if self._prompt is not None else input()
+            number = int(response) - offset
+            if 1 <= number <= len(matching_videos):
+                self.play_video(matching_videos[number - 1].video_id)
+        except ValueError:
             return
-        else:
-            print('Here are the results for ' + video_tag + ':')
-            for i in range(len(matching_video_ids)):
-                print(str(i + 1) + ") " + self.get_video_info_string(matching_video_ids[i]))
-            try:
-                print("Would you like to play any of the above? If yes, specify the number of the video.")
-                print("If your answer is not a valid number, we will assume it's a no.")
-                response = input()
-                if int(response) <= len(matching_video_ids):
-                    video_id_to_play = matching_video_ids[int(response) - 1]
-                    self.play_video(video_id_to_play)
-            except ValueError:
-                return
 
     def flag_video(self, video_id, flag_reason=""):
         """Mark a video as flagged.
@@ -380,10 +478,10 @@ class VideoPlayer:
         """
         flag_success = self._video_library.flag_video(video_id, flag_reason)
         if flag_success:
+            self._record("flag", video_id, flag_reason)
             if self._current_video_id == video_id:
                 self.stop_video()
-            print("Successfully flagged video: " + self.get_title(video_id) + " " + self.get_flag_reason(video_id))
-            self.decrement_number_of_allowed_videos()
+            self._output.print("Successfully flagged video: " + self.get_title(video_id) + " " + self.get_flag_reason(video_id))
         else:
             return
 
@@ -395,7 +493,46 @@ class VideoPlayer:
         """
         allow_success = self._video_library.allow_video(video_id)
         if allow_success:
-            print('Successfully removed flag from video: ' + self.get_title(video_id))
-            self.increment_number_of_allowed_videos()
+            self._record("allow", video_id)
+            self._output.print('Successfully removed flag from video: ' + self.get_title(video_id))
         else:
             return
+
+    def flag_videos(self, items):
+        """Flags many videos at once and prints a single summary.
+
+        Stops the current video if it is one of them.
+
+        Args:
+            items: (video_id, flag_reason) pairs.
+        """
+        summary = self._video_library.flag_videos(items)
+        if summary["changed"]:
+            self._record("flag_videos", [[video_id, self.get_video(video_id).flag_reason]
+                                         for video_id in summary["changed"]])
+            if self._current_video_id in summary["changed"]:
+                self.stop_video()
+        self._print_moderation_summary("Successfully flagged", summary, "already flagged")
+
+    def allow_videos(self, video_ids):
+        """Removes the flags of many videos at once and prints a single summary.
+
+        Args:
+            video_ids: The video_ids to be allowed again.
+        """
+        summary = self._video_library.allow_videos(video_ids)
+        if summary["changed"]:
+            self._record("allow_videos", summary["changed"])
+        self._print_moderation_summary("Successfully removed flag from", summary, "not flagged")
+
+    def _print_moderation_summary(self, action, summary, unchanged):
+        changed = len(summary["changed"])
+        message = f"{action} {changed} video{'' if changed == 1 else 's'}"
+        skipped = []
+        if summary["unchanged"]:
+            skipped.append(f"{len(summary['unchanged'])} {unchanged}")
+        if summary["missing"]:
+            skipped.append(f"{len(summary['missing'])} not found")
+        if skipped:
+            message += " (" + ", ".join(skipped) + ")"
+        self._output.print(message)
@@ -6,24 +6,43 @@ class Playlist:
 
     def __init__(self, playlist_name):
         self.name = playlist_name
-        self.videos = []  # list of video_ids
+        # video_ids in the order they were added; a dict is an insertion
+        # ordered set, so adding, finding and removing a video is O(1)
+        self.videos = {}
 
     def add_video(self, video_id):
-        self.videos.append(video_id)
+        self.videos[video_id] = None
 
-    # return True on success, False otherwise
+    # return True on success, False if the video is not in the playlist
     def remove_video(self, video_id):
         try:
-            self.videos.remove(video_id)
+            del self.videos[video_id]
             return True
-        except ValueError:
-            print("Cannot remove video from "+self.name+": Video is not in playlist")
+        except KeyError:
             return False
 
+    # removes every video id given that is in the playlist, returns the set of removed ids
+    def remove_videos(self, video_ids):
+        removed = set()
+        for video_id in video_ids:
+            if self.videos.pop(video_id, removed) is not removed:
+                removed.add(video_id)
+        return removed
+
+    def clear(self):
+        self.videos.clear()
+
     def get_name(self):
         return self.name
 
     def get_videos(self):
-        return self.videos
+        return self.videos.keys()
+
+    def __contains__(self, video_id):
+        return video_id in self.videos
 
+    def __len__(self):
+        return len(self.videos)
 
+    def __iter__(self):
+        return iter(self.videos)
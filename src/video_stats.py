@@ -0,0 +1,117 @@
+"""Counters and command latency histograms, read through STATS or snapshot().
+
+Instrumentation is switched off by passing no Stats object at all: the
+parser and the library then skip it behind a single None check.
+"""
+
+import collections
+import math
+
+# quantiles reported for every command
+QUANTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+
+# buckets per doubling of the latency, so a bucket is at most a quarter wider
+# than its lower bound; latencies below 8ns get a bucket each
+_SUB_BUCKETS = 4
+
+# enough buckets for any latency that fits in 64 bits of nanoseconds
+_BUCKETS = 65 * _SUB_BUCKETS
+
+
+def _bucket_limit(index) -> int:
+    """Returns the smallest latency, in nanoseconds, above the bucket."""
+    if index < 4 * _SUB_BUCKETS:
+        return min(index + 1, 8)
+    bits, quarter = divmod(index, _SUB_BUCKETS)
+    return (5 + quarter) << (bits - 3)
+
+
+class LatencyHistogram:
+    """Latencies in log-spaced buckets, summarised by quantiles.
+
+    Recording is one bucket increment. A quantile is reported as the upper
+    bound of the bucket it falls in, capped by the largest latency seen, so
+    it is at most a quarter above the true value.
+    """
+
+    def __init__(self):
+        self._counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0  # nanoseconds
+        self.max = 0  # nanoseconds
+
+    def record(self, nanoseconds):
+        bits = nanoseconds.bit_length()
+        if bits > 3:
+            # the two bits after the leading one pick the quarter of the doubling
+            self._counts[bits << 2 | (nanoseconds >> (bits - 3)) & 3] += 1
+        else:
+            self._counts[nanoseconds] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def quantile(self, q) -> int:
+        """Returns the latency, in nanoseconds, that a fraction q of the recorded ones do not exceed."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * q))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_limit(index) - 1, self.max)
+        return self.max
+
+
+class Stats:
+    """Per-command latencies and named counters of a player, its parser and its library.
+
+    One Stats object may be shared by many parsers and libraries, such as
+    all the sessions of a server, to add up their numbers.
+    """
+
+    def __init__(self):
+        self.commands = {}  # command name -> LatencyHistogram of its calls
+        self.errors = collections.Counter()  # command name -> failed calls
+        self.counters = collections.Counter()
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def record_command(self, name, nanoseconds, failed=False):
+        """Records one execution of a command and how long it took."""
+        latency = self.commands.get(name)
+        if latency is None:
+            latency = self.commands[name] = LatencyHistogram()
+        latency.record(nanoseconds)
+        if failed:
+            self.errors[name] += 1
+
+    def reset(self):
+        self.commands.clear()
+        self.errors.clear()
+        self.counters.clear()
+
+    def snapshot(self) -> dict:
+        """Returns the numbers recorded so far as plain data.
+
+        Returns:
+            A dict with "commands", mapping every executed command to its
+            calls, errors, mean and max latency and latency quantiles, all
+            latencies in seconds, and "counters", mapping every counter to
+            its value.
+        """
+        commands = {}
+        for name, latency in sorted(self.commands.items()):
+            entry = {
+                "calls": latency.count,
+                "errors": self.errors[name],
+                "mean": latency.total / latency.count / 1e9,
+                "max": latency.max / 1e9,
+            }
+            for label, q in QUANTILES:
+                entry[label] = latency.quantile(q) / 1e9
+            commands[name] = entry
+        return {"commands": commands, "counters": dict(sorted(self.counters.items()))}
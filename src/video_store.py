@@ -0,0 +1,134 @@
+"""Columnar storage for the videos of a library."""
+
+from array import array
+from typing import Sequence
+
+
+class VideoView:
+    """A lightweight, read-only view of one video of a library.
+
+    Offers the same properties as Video, read live from the library, so a
+    view reflects flag changes made after it was handed out.
+    """
+
+    __slots__ = ("_library", "_ordinal")
+
+    def __init__(self, library, ordinal: int):
+        self._library = library
+        self._ordinal = ordinal
+
+    @property
+    def ordinal(self) -> int:
+        """Returns the position of the video in its catalog."""
+        return self._ordinal
+
+    @property
+    def title(self) -> str:
+        """Returns the title of a video."""
+        return self._library.title(self._ordinal)
+
+    @property
+    def video_id(self) -> str:
+        """Returns the video id of a video."""
+        return self._library.video_id(self._ordinal)
+
+    @property
+    def tags(self) -> Sequence[str]:
+        """Returns the list of tags of a video."""
+        return self._library.tags(self._ordinal)
+
+    @property
+    def flagged(self) -> bool:
+        """Returns the video's flagged status, False by default"""
+        return self._library.flagged(self._ordinal)
+
+    @property
+    def flag_reason(self) -> str:
+        """Returns the video's flag reason, empty string by default """
+        return self._library.flag_reason(self._ordinal)
+
+    def __eq__(self, other):
+        if not isinstance(other, VideoView):
+            return NotImplemented
+        return self._library is other._library and self._ordinal == other._ordinal
+
+    def __hash__(self):
+        return hash((id(self._library), self._ordinal))
+
+    def __repr__(self):
+        return f"VideoView({self.video_id!r})"
+
+
+class VideoStore:
+    """Stores videos column by column instead of one object per video.
+
+    Titles are kept utf-8 encoded in one shared buffer addressed by start and
+    length arrays, and tags are interned once and referenced by number.
+    Videos are addressed by ordinal, their position in insertion order.
+    Flags are not stored here but in the FlagOverlay of each library.
+    """
+
+    def __init__(self):
+        self._ids = []  # video_id of every ordinal
+        self._ordinals = {}  # video_id -> ordinal
+        self._title_data = bytearray()
+        self._title_starts = array("Q")
+        self._title_lengths = array("I")
+        self._tag_names = []  # distinct tags, referenced by number
+        self._tag_numbers = {}  # tag -> its number in _tag_names
+        self._tag_refs = array("I")  # tag numbers of every video, back to back
+        self._tag_starts = array("Q")
+        self._tag_counts = array("H")
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, title, video_id, tags) -> int:
+        """Stores a video and returns its ordinal.
+
+        A video with an id that is already stored replaces the old one in
+        place, keeping its ordinal.
+        """
+        encoded_title = title.encode()
+        tag_start = len(self._tag_refs)
+        for tag in tags:
+            number = self._tag_numbers.get(tag)
+            if number is None:
+                number = self._tag_numbers[tag] = len(self._tag_names)
+                self._tag_names.append(tag)
+            self._tag_refs.append(number)
+
+        ordinal = self._ordinals.get(video_id)
+        if ordinal is not None:
+            self._title_starts[ordinal] = len(self._title_data)
+            self._title_lengths[ordinal] = len(encoded_title)
+            self._title_data += encoded_title
+            self._tag_starts[ordinal] = tag_start
+            self._tag_counts[ordinal] = len(tags)
+            return ordinal
+
+        ordinal = len(self._ids)
+        self._ids.append(video_id)
+        self._ordinals[video_id] = ordinal
+        self._title_starts.append(len(self._title_data))
+        self._title_lengths.append(len(encoded_title))
+        self._title_data += encoded_title
+        self._tag_starts.append(tag_start)
+        self._tag_counts.append(len(tags))
+        return ordinal
+
+    def ordinal(self, video_id):
+        """Returns the ordinal of a video id, None if it is not stored."""
+        return self._ordinals.get(video_id)
+
+    def video_id(self, ordinal) -> str:
+        return self._ids[ordinal]
+
+    def title(self, ordinal) -> str:
+        start = self._title_starts[ordinal]
+        return self._title_data[start:start + self._title_lengths[ordinal]].decode()
+
+    def tags(self, ordinal) -> Sequence[str]:
+        start = self._tag_starts[ordinal]
+        names = self._tag_names
+        return tuple(names[number] for number in self._tag_refs[start:start + self._tag_counts[ordinal]])
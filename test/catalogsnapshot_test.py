@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from src.catalog_snapshot import SnapshotError, SnapshotStore, compile_snapshot, open_snapshot
+from src.video_library import VideoLibrary
+
+CATALOG = ("Funny Dogs | funny_dogs_video_id |  #dog , #animal\n"
+           "Amazing Cats | amazing_cats_video_id |  #cat , #animal\n"
+           "Video about nothing | nothing_video_id |\n")
+
+
+def test_snapshot_decodes_videos(tmp_path):
+    source = tmp_path / "videos.txt"
+    source.write_text(CATALOG)
+    store = SnapshotStore(compile_snapshot(source))
+    assert len(store) == 3
+    ordinal = store.ordinal("amazing_cats_video_id")
+    assert store.title(ordinal) == "Amazing Cats"
+    assert store.tags(ordinal) == ("#cat", "#animal")
+    assert store.tags(store.ordinal("nothing_video_id")) == ()
+    assert store.ordinal("missing_video_id") is None
+
+
+def test_stale_snapshot_is_rebuilt(tmp_path):
+    source = tmp_path / "videos.txt"
+    source.write_text(CATALOG)
+    assert len(open_snapshot(source)) == 3
+    source.write_text(CATALOG + "Life at Google | life_at_google_video_id | #google\n")
+    store = open_snapshot(source)
+    assert len(store) == 4
+    assert store.title(store.ordinal("life_at_google_video_id")) == "Life at Google"
+
+
+def test_library_from_snapshot(tmp_path):
+    source = tmp_path / "videos.txt"
+    source.write_text(CATALOG)
+    snapshot = tmp_path / "cache.snap"
+    library = VideoLibrary(source, snapshot=snapshot, shared=False)
+    assert os.path.exists(snapshot)
+    assert [video.video_id for video in library.get_all_videos()] == \
+        ["funny_dogs_video_id", "amazing_cats_video_id", "nothing_video_id"]
+    assert library.flag_video("funny_dogs_video_id", "dont_like")
+    assert library.get_video("funny_dogs_video_id").flag_reason == "dont_like"
+    assert not library.get_video("amazing_cats_video_id").flagged
+    library.add_video("Life at Google", "life_at_google_video_id", ["#google"])
+    assert library.get_video("life_at_google_video_id").tags == ("#google",)
+    assert len(library) == 4
+
+
+def test_damaged_section_table_is_rebuilt(tmp_path):
+    source = tmp_path / "videos.txt"
+    source.write_text(CATALOG)
+    snapshot = compile_snapshot(source)
+    data = bytearray(snapshot.read_bytes())
+    # the size of the first section, right after the 40-byte header and its offset
+    for size in (13, 16):
+        data[48:56] = size.to_bytes(8, "little")
+        snapshot.write_bytes(data)
+        with pytest.raises(SnapshotError, match="damaged"):
+            SnapshotStore(snapshot)
+        store = open_snapshot(source)
+        assert store.title(store.ordinal("funny_dogs_video_id")) == "Funny Dogs"
@@ -0,0 +1,243 @@
+import sys
+
+import pytest
+
+from src.command_parser import CommandException, CommandParser
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_stats import Stats
+
+
+def test_dispatches_commands_ignoring_case(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["number_of_videos"])
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    parser.execute_command(["flag_video", "amazing_cats_video_id", "dont_like_cats"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4
+    assert "5 videos in the library" in lines[0]
+    assert "Playing video: Amazing Cats" in lines[1]
+    assert "Stopping video: Amazing Cats" in lines[2]
+    assert "Successfully flagged video: Amazing Cats (reason: dont_like_cats)" in lines[3]
+
+
+def test_wrong_number_of_arguments():
+    parser = CommandParser(VideoPlayer())
+    with pytest.raises(CommandException, match="Please enter PLAY command followed by video_id."):
+        parser.execute_command(["PLAY"])
+    with pytest.raises(CommandException, match="Please enter FLAG_VIDEO command"):
+        parser.execute_command(["FLAG_VIDEO", "a", "b", "c"])
+
+
+def test_unknown_command(capfd):
+    CommandParser(VideoPlayer()).execute_command(["DANCE"])
+    out, err = capfd.readouterr()
+    assert "Please enter a valid command, type HELP for a list of available commands." in out
+
+
+def test_registered_command_is_dispatched():
+    calls = []
+    CommandParser.register_command("ECHO_TEST", lambda parser, *args: calls.append(args), (0, 1))
+    try:
+        parser = CommandParser(VideoPlayer())
+        parser.execute_command(["echo_test", "hello"])
+        parser.execute_command(["ECHO_TEST"])
+        assert calls == [("hello",), ()]
+    finally:
+        del CommandParser._commands["ECHO_TEST"]
+
+
+def test_show_all_videos_paging(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["SHOW_ALL_VIDEOS", "offset", "1", "LIMIT", "2"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4
+    assert "Here's a list of all available videos:" in lines[0]
+    assert "Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[1]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[2]
+    assert "There are more videos, enter SHOW_ALL_VIDEOS OFFSET 3 to see them." in lines[3]
+    with pytest.raises(CommandException, match="SHOW_ALL_VIDEOS command optionally"):
+        parser.execute_command(["SHOW_ALL_VIDEOS", "LIMIT", "many"])
+
+
+def test_bulk_moderation_from_arguments_and_file(capfd, tmp_path):
+    moderation = tmp_path / "moderation.txt"
+    moderation.write_text("# sweep\nfunny_dogs_video_id|too_loud\n\nnothing_video_id\nno_such_video_id|spam\n")
+    player = VideoPlayer()
+    parser = CommandParser(player, allow_files=True)
+    parser.execute_command(["PLAY", "funny_dogs_video_id"])
+    parser.execute_command(["FLAG_VIDEOS", f"@{moderation}", "amazing_cats_video_id|dont_like_cats",
+                            "nothing_video_id"])
+    parser.execute_command(["ALLOW_VIDEOS", "nothing_video_id", "another_cat_video_id"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[1:] == [
+        "Stopping video: Funny Dogs",
+        "Successfully flagged 3 videos (1 already flagged, 1 not found)",
+        "Successfully removed flag from 1 video (1 not flagged)",
+    ]
+    assert player.get_video("funny_dogs_video_id").flag_reason == "too_loud"
+    assert not player.get_video("nothing_video_id").flagged
+    assert player.number_of_allowed_videos() == 3
+    with pytest.raises(CommandException, match="Cannot read"):
+        parser.execute_command(["ALLOW_VIDEOS", f"@{tmp_path / 'missing.txt'}"])
+    with pytest.raises(CommandException, match="not allowed"):
+        CommandParser(player).execute_command(["FLAG_VIDEOS", f"@{moderation}"])
+
+
+def test_search_paging_numbers_results_across_pages(capfd):
+    answers = iter(["2", "3"])
+    parser = CommandParser(VideoPlayer(prompt=lambda: next(answers)))
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#animal", "LIMIT", "2"])
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#animal", "offset", "2", "limit", "2"])
+    parser.execute_command(["SEARCH_VIDEOS", "cat", "OFFSET", "5"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[:4] == [
+        "Here are the results for #animal:",
+        "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "2) Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "There are more results, search again with OFFSET 2 to see them.",
+    ]
+    assert lines[6] == "Playing video: Amazing Cats"
+    assert lines[7:9] == [
+        "Here are the results for #animal:",
+        "3) Another Cat Video (another_cat_video_id) [#cat #animal]",
+    ]
+    assert lines[11:] == [
+        "Stopping video: Amazing Cats",
+        "Playing video: Another Cat Video",
+        "No more search results for cat",
+    ]
+    with pytest.raises(CommandException, match="Please enter SEARCH_VIDEOS command"):
+        parser.execute_command(["SEARCH_VIDEOS", "cat", "LIMIT"])
+    with pytest.raises(CommandException, match="Please enter SEARCH_VIDEOS command"):
+        parser.execute_command(["SEARCH_VIDEOS", "cat", "LIMIT", "0"])
+    with pytest.raises(CommandException, match="Please enter SEARCH_VIDEOS_WITH_TAG command"):
+        parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#cat", "LIMIT", "0"])
+
+
+def test_paging_rejects_numbers_that_are_not_plain_or_too_large(capfd):
+    parser = CommandParser(VideoPlayer(interactive=False))
+    for options in (["OFFSET", "99999999999999999999"], ["LIMIT", "²"], ["OFFSET", "١"],
+                    ["LIMIT", "9" * 5000]):
+        with pytest.raises(CommandException, match="Please enter SEARCH_VIDEOS command"):
+            parser.execute_command(["SEARCH_VIDEOS", "cat"] + options)
+        with pytest.raises(CommandException, match="Please enter SEARCH_VIDEOS_WITH_TAG command"):
+            parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#cat"] + options)
+    capfd.readouterr()
+    parser.execute_command(["SEARCH_VIDEOS", "cat", "OFFSET", "1", "LIMIT", str(sys.maxsize)])
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#cat", "LIMIT", str(sys.maxsize)])
+    out, err = capfd.readouterr()
+    assert "2) Another Cat Video (another_cat_video_id) [#cat #animal]" in out.splitlines()
+
+
+def test_search_answer_outside_the_page_plays_nothing(capfd):
+    parser = CommandParser(VideoPlayer(prompt=lambda: "0"))
+    parser.execute_command(["SEARCH_VIDEOS", "cat"])
+    out, err = capfd.readouterr()
+    assert "Playing video" not in out
+
+
+def test_play_result_picks_from_the_last_search(capfd):
+    player = VideoPlayer(interactive=False)
+    parser = CommandParser(player)
+    parser.execute_command(["PLAY_RESULT", "1"])
+    assert [video.video_id for video in player.find_videos("cat", 1)] == ["another_cat_video_id"]
+    parser.execute_command(["PLAY_RESULT", "1"])
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#dog"])
+    parser.execute_command(["PLAY_RESULT", "1"])
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Cannot play result: There are no search results to play",
+        "Cannot play result: There is no result number 1",
+        "Here are the results for #dog:",
+        "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "To play one of the above, enter PLAY_RESULT and its number.",
+        "Playing video: Funny Dogs",
+    ]
+    with pytest.raises(CommandException, match="PLAY_RESULT command"):
+        parser.execute_command(["PLAY_RESULT", "first"])
+    for number in ("²", "9" * 30):
+        with pytest.raises(CommandException, match="Please enter PLAY_RESULT command"):
+            parser.execute_command(["PLAY_RESULT", number])
+
+
+def test_complete_ids_and_titles(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["COMPLETE", "an", "5"])
+    parser.execute_command(["PLAY_RESULT", "1"])
+    parser.execute_command(["COMPLETE", "xyz"])
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Completions for an:",
+        "1) Another Cat Video (another_cat_video_id) [#cat #animal]",
+        "Playing video: Another Cat Video",
+        "No completions for xyz",
+    ]
+    with pytest.raises(CommandException, match="Please enter COMPLETE command"):
+        parser.execute_command(["COMPLETE", "an", "many"])
+    for k in ("0", "²", "9" * 30):
+        with pytest.raises(CommandException, match="Please enter COMPLETE command"):
+            parser.execute_command(["COMPLETE", "an", k])
+    capfd.readouterr()
+    parser.execute_command(["COMPLETE", "a", str(sys.maxsize)])
+    out, err = capfd.readouterr()
+    assert len(out.splitlines()) == 3
+
+
+def test_tag_expressions_skip_flagged_videos(capfd):
+    parser = CommandParser(VideoPlayer(interactive=False))
+    parser.execute_command(["FLAG_VIDEO", "another_cat_video_id"])
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "(#cat", "OR", "#dog)", "NOT", "#google",
+                            "LIMIT", "5"])
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#cat", "AND"])
+    out, err = capfd.readouterr()
+    assert out.splitlines()[1:] == [
+        "Here are the results for (#cat OR #dog) NOT #google:",
+        "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "2) Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "To play one of the above, enter PLAY_RESULT and its number.",
+        "Cannot search tags: The tag expression ends too early",
+    ]
+
+
+def test_stats_records_commands_and_library_counters(capfd):
+    stats = Stats()
+    parser = CommandParser(VideoPlayer(VideoLibrary(stats=stats), interactive=False), stats,
+                           allow_stats_reset=True)
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    parser.execute_command(["PLAY", "missing_video_id"])
+    with pytest.raises(CommandException):
+        parser.execute_command(["PLAY"])
+    parser.execute_command(["DANCE"])
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#cat"])
+    snapshot = stats.snapshot()
+    assert (snapshot["commands"]["PLAY"]["calls"], snapshot["commands"]["PLAY"]["errors"]) == (3, 1)
+    assert snapshot["counters"]["commands.unknown"] == 1
+    assert snapshot["counters"]["library.lookup_misses"] == 1
+    assert snapshot["counters"]["tag_search.tag_index"] == 1
+    capfd.readouterr()
+
+    parser.execute_command(["stats"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[0] == "Command statistics:"
+    assert lines[1].startswith("  PLAY: 3 calls, 1 errors, mean ")
+    assert "  commands.unknown: 1" in lines
+    parser.execute_command(["STATS", "reset"])
+    # the reset itself is recorded once it is done
+    assert list(stats.snapshot()["commands"]) == ["STATS"]
+    assert stats.snapshot()["counters"] == {}
+    with pytest.raises(CommandException, match="Please enter STATS command"):
+        parser.execute_command(["STATS", "everything"])
+
+
+def test_stats_switched_off(capfd):
+    parser = CommandParser(VideoPlayer())
+    assert parser.stats is None
+    parser.execute_command(["STATS"])
+    out, err = capfd.readouterr()
+    assert out == "Cannot show stats: Statistics are switched off\n"
@@ -1,3 +1,4 @@
+import random
 import re
 from src.video_player import VideoPlayer
 
@@ -236,3 +237,19 @@ def test_continue_none_playing(capfd):
     lines = out.splitlines()
     assert len(lines) == 1
     assert "Cannot continue video: No video is currently playing" in lines[0]
+
+
+def test_play_random_is_reproducible_and_skips_flagged(capfd):
+    players = [VideoPlayer(rng=random.Random(7)) for _ in range(2)]
+    for player in players:
+        for video_id in ["funny_dogs_video_id", "amazing_cats_video_id", "nothing_video_id"]:
+            player.flag_video(video_id)
+    capfd.readouterr()
+    for _ in range(10):
+        for player in players:
+            player.play_random_video()
+    out, err = capfd.readouterr()
+    lines = [line for line in out.splitlines() if line.startswith("Playing video")]
+    assert len(lines) == 20
+    assert lines[0::2] == lines[1::2]
+    assert set(lines) <= {"Playing video: Another Cat Video", "Playing video: Life at Google"}
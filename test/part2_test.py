@@ -235,3 +235,55 @@ def test_delete_playlist_nonexistent(capfd):
     lines = out.splitlines()
     assert len(lines) == 1
     assert "Cannot delete playlist my_cool_playlist: Playlist does not exist" in lines[0]
+
+
+def test_delete_playlist_and_recreate_other_case(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_cool_playlist")
+    player.create_playlist("another_playlist")
+    player.delete_playlist("MY_COOL_PLAYLIST")
+    player.create_playlist("My_Cool_Playlist")
+    player.show_all_playlists()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert "Deleted playlist: MY_COOL_PLAYLIST" in lines[2]
+    assert "Successfully created new playlist: My_Cool_Playlist" in lines[3]
+    assert "Showing all playlists:" in lines[4]
+    assert "My_Cool_Playlist" in lines[5]
+    assert "another_playlist" in lines[6]
+
+
+def test_remove_many_from_playlist(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_cool_playlist")
+    player.add_to_playlist("my_cool_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_cool_playlist", "funny_dogs_video_id")
+    player.remove_from_playlist("my_cool_playlist", "funny_dogs_video_id", "some_other_video_id",
+                                "nothing_video_id", "amazing_cats_video_id", "funny_dogs_video_id")
+    player.show_playlist("my_cool_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 10
+    assert "Removed video from my_cool_playlist: Funny Dogs" in lines[3]
+    assert "Cannot remove video from my_cool_playlist: Video does not exist" in lines[4]
+    assert "Cannot remove video from my_cool_playlist: Video is not in playlist" in lines[5]
+    assert "Removed video from my_cool_playlist: Amazing Cats" in lines[6]
+    assert "Cannot remove video from my_cool_playlist: Video is not in playlist" in lines[7]
+    assert "Showing playlist: my_cool_playlist" in lines[8]
+    assert "No videos here yet" in lines[9]
+
+
+def test_clear_playlist_with_many_videos(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_cool_playlist")
+    for video_id in ["amazing_cats_video_id", "funny_dogs_video_id", "nothing_video_id"]:
+        player.add_to_playlist("my_cool_playlist", video_id)
+    player.clear_playlist("my_cool_playlist")
+    player.show_playlist("my_cool_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert "Successfully removed all videos from my_cool_playlist" in lines[4]
+    assert "Showing playlist: my_cool_playlist" in lines[5]
+    assert "No videos here yet" in lines[6]
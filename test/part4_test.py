@@ -218,6 +218,17 @@ def test_flag_video_stops_paused_video(capfd):
     assert "No video is currently playing" in lines[4]
 
 
+def test_pause_after_paused_video_was_flagged(capfd):
+    player = VideoPlayer()
+    player.play_video("amazing_cats_video_id")
+    player.pause_video()
+    player.flag_video("amazing_cats_video_id")
+    player.pause_video()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "Cannot pause video: No video is currently playing" in lines[-1]
+
+
 def test_allow_video(capfd):
     player = VideoPlayer()
     player.flag_video("amazing_cats_video_id", "dont_like_cats")
@@ -0,0 +1,53 @@
+import io
+
+from src.command_parser import CommandParser
+from src.run import run_batch
+from src.video_player import VideoPlayer
+
+SCRIPT = """# bulk playlist setup
+CREATE_PLAYLIST my_playlist
+
+ADD_TO_PLAYLIST my_playlist amazing_cats_video_id
+PLAY
+ADD_TO_PLAYLIST my_playlist funny_dogs_video_id
+EXIT
+SHOW_PLAYLIST my_playlist
+"""
+
+
+def test_batch_continues_after_errors(capfd):
+    parser = CommandParser(VideoPlayer())
+    assert run_batch(io.StringIO(SCRIPT), parser) == (4, 1)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4
+    assert "Successfully created new playlist: my_playlist" in lines[0]
+    assert "Added video to my_playlist: Amazing Cats" in lines[1]
+    assert "Please enter PLAY command followed by video_id." in lines[2]
+    assert "Added video to my_playlist: Funny Dogs" in lines[3]
+
+
+def test_batch_stops_at_first_error(capfd):
+    parser = CommandParser(VideoPlayer())
+    assert run_batch(io.StringIO("DANCE\nNUMBER_OF_VIDEOS\n"), parser, stop_on_error=True) == (1, 1)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 1
+    assert "Please enter a valid command" in lines[0]
+
+
+def test_batch_continues_after_a_command_raises(capfd):
+    def fail(parser):
+        raise RuntimeError("broken")
+
+    CommandParser.register_command("FAIL_TEST", fail)
+    try:
+        parser = CommandParser(VideoPlayer())
+        assert run_batch(io.StringIO("FAIL_TEST\nNUMBER_OF_VIDEOS\n"), parser) == (2, 1)
+        assert run_batch(io.StringIO("FAIL_TEST\nNUMBER_OF_VIDEOS\n"), parser,
+                         stop_on_error=True) == (1, 1)
+    finally:
+        del CommandParser._commands["FAIL_TEST"]
+    out, err = capfd.readouterr()
+    assert out.splitlines() == ["Cannot execute command: broken", "5 videos in the library",
+                                "Cannot execute command: broken"]
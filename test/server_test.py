@@ -0,0 +1,86 @@
+import asyncio
+import shutil
+
+from src import server
+from src.command_parser import CommandParser
+from src.server import Session, VideoServer, encode_response
+from src.video_library import DEFAULT_CATALOG
+from src.video_stats import Stats
+
+
+def test_sessions_have_their_own_state(tmp_path):
+    catalog = shutil.copy(DEFAULT_CATALOG, tmp_path / "videos.txt")
+    first, second = Session(catalog), Session(catalog)
+    assert first.execute("FLAG_VIDEO amazing_cats_video_id") == \
+        ["Successfully flagged video: Amazing Cats (reason: Not supplied)"]
+    assert second.execute("PLAY amazing_cats_video_id") == ["Playing video: Amazing Cats"]
+    assert first.execute("PLAY") == ["Please enter PLAY command followed by video_id."]
+    assert first.execute("FLAG_VIDEOS @/etc/passwd") == \
+        ["Cannot read files: @file arguments are not allowed here"]
+
+
+def test_encode_response_escapes_dots():
+    assert encode_response(["one", ".two\nthree"]) == b"one\n..two\nthree\n.\n"
+
+
+def test_pipelined_commands_over_tcp(tmp_path):
+    catalog = shutil.copy(DEFAULT_CATALOG, tmp_path / "videos.txt")
+
+    async def exchange():
+        server = await VideoServer(catalog).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"NUMBER_OF_VIDEOS\nPLAY funny_dogs_video_id\nSEARCH_VIDEOS dogs\nEXIT\n")
+        await writer.drain()
+        received = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return received.decode().splitlines()
+
+    lines = asyncio.run(exchange())
+    assert lines == [
+        "5 videos in the library", ".",
+        "Playing video: Funny Dogs", ".",
+        "Here are the results for dogs:",
+        "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "To play one of the above, enter PLAY_RESULT and its number.", ".",
+        "YouTube has now terminated its execution. Thank you and goodbye!", ".",
+    ]
+
+
+def test_sessions_share_stats_but_cannot_reset_them(tmp_path):
+    catalog = shutil.copy(DEFAULT_CATALOG, tmp_path / "videos.txt")
+    stats = Stats()
+    first, second = Session(catalog, stats), Session(catalog, stats)
+    first.execute("NUMBER_OF_VIDEOS")
+    second.execute("NUMBER_OF_VIDEOS")
+    assert second.execute("STATS RESET") == ["Cannot reset stats: Resetting is not allowed here"]
+    assert stats.snapshot()["commands"]["NUMBER_OF_VIDEOS"]["calls"] == 2
+
+
+def test_sessions_list_at_most_max_page_videos(tmp_path, monkeypatch):
+    catalog = shutil.copy(DEFAULT_CATALOG, tmp_path / "videos.txt")
+    monkeypatch.setattr(server, "MAX_PAGE", 2)
+    session = Session(catalog)
+    assert session.execute("SHOW_ALL_VIDEOS")[1:] == [
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "Another Cat Video (another_cat_video_id) [#cat #animal]",
+        "There are more videos, enter SHOW_ALL_VIDEOS OFFSET 2 to see them.",
+    ]
+    assert session.execute("SEARCH_VIDEOS a LIMIT 50")[-2] == \
+        "There are more results, search again with OFFSET 2 to see them."
+
+
+def test_failing_command_keeps_the_session(tmp_path):
+    def fail(parser):
+        raise RuntimeError("broken")
+
+    catalog = shutil.copy(DEFAULT_CATALOG, tmp_path / "videos.txt")
+    CommandParser.register_command("FAIL_TEST", fail)
+    try:
+        session = Session(catalog)
+        assert session.execute("FAIL_TEST") == ["Cannot execute command: Internal error"]
+        assert session.execute("NUMBER_OF_VIDEOS") == ["5 videos in the library"]
+    finally:
+        del CommandParser._commands["FAIL_TEST"]
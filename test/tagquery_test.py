@@ -0,0 +1,52 @@
+import pytest
+
+from src.tag_query import MAX_NESTING, TagQueryError, bits_from_ordinals, evaluate, is_tag_query, iter_ordinals
+
+# ordinal -> tags
+VIDEOS = [{"#dog", "#animal"}, {"#cat", "#animal"}, {"#cat", "#animal"}, {"#google", "#cat"}, set()]
+UNIVERSE = (1 << len(VIDEOS)) - 1
+
+
+def tag_bits(tag):
+    return bits_from_ordinals((o for o, tags in enumerate(VIDEOS) if tag.casefold() in tags),
+                              len(VIDEOS))
+
+
+def query(text):
+    return list(iter_ordinals(evaluate(text, tag_bits, UNIVERSE)))
+
+
+def test_operators_and_precedence():
+    assert query("#cat AND #animal") == [1, 2]
+    assert query("#cat #animal") == [1, 2]
+    assert query("#cat NOT #animal") == [3]
+    assert query("#dog OR #google") == [0, 3]
+    assert query("#dog or #cat and #google") == [0, 3]
+    assert query("(#dog OR #cat) AND NOT #google") == [0, 1, 2]
+    assert query("NOT #animal") == [3, 4]
+    assert query("#CAT AND #missing") == []
+
+
+def test_malformed_expressions():
+    for text in ("#cat AND", "(#cat", "#cat )", "OR #cat", ""):
+        with pytest.raises(TagQueryError):
+            query(text)
+    assert not is_tag_query("#cat")
+    assert is_tag_query("#cat #dog") and is_tag_query("NOT")
+
+
+def test_deep_expressions_fail_without_recursing_too_far():
+    assert query("NOT " * 3001 + "#animal") == [3, 4]
+    assert query("NOT " * 3000 + "#animal") == [0, 1, 2]
+    nested = "(" * MAX_NESTING + "#dog" + ")" * MAX_NESTING
+    assert query(nested) == [0]
+    with pytest.raises(TagQueryError, match="nests more than"):
+        query("(" + nested + ")")
+    with pytest.raises(TagQueryError):
+        query("(" * 3000 + "#cat")
+
+
+def test_iter_ordinals_skips_empty_bytes():
+    ordinals = [0, 7, 8, 1000, 123456]
+    assert list(iter_ordinals(bits_from_ordinals(ordinals, 200000))) == ordinals
+    assert list(iter_ordinals(0)) == []
@@ -0,0 +1,28 @@
+from src.video_flags import FlagOverlay
+
+
+def test_overlay_keeps_reasons_of_flagged_videos():
+    flags = FlagOverlay()
+    assert not flags
+    flags.flag(9, "dont_like")
+    assert flags.flagged(9) and flags.reason(9) == "dont_like"
+    assert not flags.flagged(8) and flags.reason(8) == ""
+    assert len(flags) == 1 and list(flags) == [9]
+    flags.allow(9)
+    assert not flags and not flags.flagged(9)
+
+
+def test_child_overlay_leaves_parent_untouched():
+    parent = FlagOverlay()
+    parent.flag(1, "spam")
+    child = FlagOverlay(parent)
+    assert child.flagged(1) and child.reason(1) == "spam"
+    child.allow(1)
+    child.flag(2)
+    assert not child.flagged(1) and child.flagged(2)
+    assert parent.flagged(1) and not parent.flagged(2)
+    assert len(child) == 1 and sorted(child) == [2]
+    version = child.version
+    parent.flag(3)
+    assert child.flagged(3) and sorted(child) == [2, 3]
+    assert child.version != version
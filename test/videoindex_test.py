@@ -0,0 +1,109 @@
+import random
+
+from src.video_index import PlayableSet, PrefixIndex, SortedListing, TagIndex, TitleIndex, TrigramIndex
+
+TITLES = ["Funny Dogs", "Amazing Cats", "Another Cat Video", "Life at Google", "Video about nothing"]
+
+
+def matching(index, term):
+    candidates = index.candidates(term)
+    return sorted(o for o in candidates if term.casefold() in TITLES[o].casefold())
+
+
+def test_title_index_substring_queries():
+    index = TitleIndex.build(enumerate(TITLES))
+    assert matching(index, "cat") == [1, 2]
+    assert matching(index, "CAT") == [1, 2]
+    assert matching(index, "t vid") == [2]
+    assert matching(index, "e at goo") == [3]
+    assert matching(index, "ogs") == [0]
+    assert matching(index, "blah") == []
+    assert index.candidates("  ") is None
+
+
+def test_trigram_index_narrows_substring_queries():
+    index = TrigramIndex.build(enumerate(TITLES))
+    assert matching(index, "CAT") == [1, 2]
+    assert matching(index, "t vid") == [2]
+    assert matching(index, "e at goo") == [3]
+    assert list(index.candidates("blah")) == []
+    assert index.candidates("at") is None
+    candidates = list(index.candidates("video"))
+    assert candidates == sorted(candidates)
+
+
+def test_trigram_index_incremental_updates():
+    index = TrigramIndex()
+    for ordinal, title in enumerate(TITLES):
+        index.add(ordinal, title)
+    index.remove(2, TITLES[2])
+    assert matching(index, "video") == [4]
+    index.add(2, "Cat Video Compilation")
+    index.add(7, "Cat Video Compilation")
+    assert list(index.candidates("compil")) == [2, 7]
+
+
+def test_title_index_incremental_updates():
+    index = TitleIndex()
+    for ordinal, title in enumerate(TITLES):
+        index.add(ordinal, title)
+    assert matching(index, "video") == [2, 4]
+    index.remove(2, TITLES[2])
+    assert matching(index, "video") == [4]
+    index.add(5, "Cat Video Compilation")
+    assert 5 in index.candidates("at vi")
+    assert 2 not in index.candidates("video")
+
+
+def test_tag_index_ignores_case_and_tracks_removals():
+    index = TagIndex()
+    index.add(0, ["#dog", "#animal"])
+    index.add(2, ["#Cat", "#animal"])
+    index.add(1, ["#cat", "#ANIMAL"])
+    assert list(index.lookup("#CAT")) == [1, 2]
+    assert list(index.lookup("#animal")) == [0, 1, 2]
+    index.remove(1, ["#cat", "#animal"])
+    assert list(index.lookup("#cat")) == [2]
+    assert list(index.lookup("#animal")) == [0, 2]
+    assert list(index.lookup("#blah")) == []
+
+
+def test_playable_set_swap_removes():
+    playable = PlayableSet(range(5))
+    playable.discard(1)
+    playable.discard(4)
+    playable.discard(4)
+    assert len(playable) == 3
+    assert 1 not in playable and 4 not in playable and 0 in playable
+    playable.add(1)
+    playable.add(9)
+    assert set(playable.choice(random.Random(seed)) for seed in range(200)) == {0, 1, 2, 3, 9}
+    assert PlayableSet().choice(random.Random()) is None
+
+
+def test_sorted_listing_inserts_in_order():
+    lines = {0: "b", 1: "a", 2: "d"}
+    listing = SortedListing.build(lines.__getitem__, lines)
+    assert listing.page() == [1, 0, 2]
+    lines[3] = "c"
+    listing.add(3)
+    assert listing.page(1, 2) == [0, 3]
+    listing.remove(0, "b")
+    assert listing.page() == [1, 3, 2]
+    lines.update({4: "0", 5: "z"})
+    listing.add(5)
+    listing.add(4)
+    assert listing.page() == [4, 1, 3, 2, 5]
+
+
+def test_prefix_index_completes_in_key_order():
+    index = PrefixIndex.build([(0, "amazing_cats_video_id"), (0, "Amazing Cats"),
+                               (1, "another_cat_video_id"), (1, "Another Cat Video")])
+    assert index.complete("AMAZ", 10) == [0]
+    assert index.complete("a", 10) == [0, 1]
+    assert index.complete("a", 1) == [0]
+    assert index.complete("zzz", 10) == []
+    index.remove(0, ["amazing_cats_video_id", "Amazing Cats"])
+    index.add(2, ["amazing_dogs_video_id"])
+    assert index.complete("am", 10) == [2]
+    assert len(index) == 3
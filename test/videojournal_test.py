@@ -0,0 +1,76 @@
+from src.video_journal import Journal
+from src.video_output import CollectingSink
+from src.video_player import VideoPlayer
+
+
+def player_with(journal):
+    return VideoPlayer(output=CollectingSink(), journal=journal)
+
+
+def test_playlists_and_flags_survive_a_restart(tmp_path):
+    journal = Journal(tmp_path / "journal")
+    player = player_with(journal)
+    player.create_playlist("My_Playlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.remove_from_playlist("my_playlist", "amazing_cats_video_id")
+    player.create_playlist("gone")
+    player.delete_playlist("gone")
+    player.flag_video("nothing_video_id", "boring")
+    player.flag_video("life_at_google_video_id")
+    player.allow_video("life_at_google_video_id")
+    journal.close()
+
+    player = player_with(Journal(tmp_path / "journal"))
+    assert player.get_playlist("gone") is None
+    assert player.get_playlist("MY_PLAYLIST").get_name() == "My_Playlist"
+    assert list(player.get_playlist("my_playlist")) == ["funny_dogs_video_id"]
+    assert player.get_video("nothing_video_id").flag_reason == "boring"
+    assert not player.get_video("life_at_google_video_id").flagged
+
+
+def test_compaction_bounds_the_journal(tmp_path):
+    journal = Journal(tmp_path / "journal", compact_every=3)
+    player = player_with(journal)
+    player.create_playlist("list")
+    for video_id in ("amazing_cats_video_id", "funny_dogs_video_id", "nothing_video_id"):
+        player.add_to_playlist("list", video_id)
+    player.clear_playlist("list")
+    journal.close()
+    assert journal.snapshot_path.exists()
+    assert len(journal.path.read_bytes().splitlines()) == 1 + 2  # header and two changes
+
+    replayed = []
+    recovered = Journal(tmp_path / "journal")
+    player = VideoPlayer(output=CollectingSink())
+    recovered.recover(player._restore, lambda change: replayed.append(change) or player._apply(change))
+    assert len(replayed) == 2
+    assert replayed[-1] == ["clear", "list"]
+    assert len(player.get_playlist("list")) == 0
+    recovered.close()
+
+
+def test_torn_last_change_is_dropped(tmp_path):
+    journal = Journal(tmp_path / "journal")
+    player = player_with(journal)
+    player.create_playlist("list")
+    journal.close()
+    with open(journal.path, "ab") as file:
+        file.write(b'["create","half')
+    journal = Journal(tmp_path / "journal")
+    player = player_with(journal)
+    player.create_playlist("other")
+    journal.close()
+    player = player_with(Journal(tmp_path / "journal"))
+    assert player.get_playlist("list") is not None and player.get_playlist("other") is not None
+
+
+def test_bulk_moderation_is_journaled(tmp_path):
+    journal = Journal(tmp_path / "journal")
+    player = player_with(journal)
+    player.flag_videos([("amazing_cats_video_id", "spam"), ("funny_dogs_video_id", "")])
+    player.allow_videos(["funny_dogs_video_id"])
+    journal.close()
+    player = player_with(Journal(tmp_path / "journal"))
+    assert player.get_video("amazing_cats_video_id").flag_reason == "spam"
+    assert not player.get_video("funny_dogs_video_id").flagged
@@ -1,4 +1,11 @@
+import io
+import random
+
+import pytest
+
+from src.video_flags import FlagOverlay
 from src.video_library import VideoLibrary
+from src.video_stats import Stats
 
 
 def test_library_has_all_videos():
@@ -24,3 +31,129 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_loads_catalog_from_file_object():
+    catalog = io.StringIO("First | first_id | #a , #b\n\nSecond | second_id |\n")
+    library = VideoLibrary(catalog)
+    assert len(library.get_all_videos()) == 2
+    assert library.get_video("first_id").tags == ("#a", "#b")
+    assert library.get_video("second_id").tags == ()
+
+
+def test_ingest_loads_in_chunks():
+    catalog = io.StringIO("".join(f"Video {i} | id_{i} | #tag\n" for i in range(5)))
+    reported = []
+    library = VideoLibrary(None)
+    assert library.get_all_videos() == []
+    loader = library.ingest(catalog, chunk_size=2, progress=reported.append)
+    assert next(loader) == 2
+    assert len(library.get_all_videos()) == 2
+    assert list(loader) == [4, 5]
+    assert reported == [2, 4, 5]
+    assert library.get_video("id_4").title == "Video 4"
+
+
+def test_search_titles_skips_flagged_and_sees_new_videos():
+    library = VideoLibrary(shared=False)
+    assert [v.video_id for v in library.search_titles("CAT")] == \
+        ["amazing_cats_video_id", "another_cat_video_id"]
+    library.flag_video("amazing_cats_video_id")
+    library.add_video("Cat Compilation", "cat_compilation_id", ["#cat"])
+    assert [v.video_id for v in library.search_titles("cat")] == \
+        ["another_cat_video_id", "cat_compilation_id"]
+
+
+def test_search_tag_follows_flags():
+    library = VideoLibrary()
+    assert [v.video_id for v in library.search_tag("#CAT")] == \
+        ["amazing_cats_video_id", "another_cat_video_id"]
+    library.flag_video("amazing_cats_video_id")
+    assert [v.video_id for v in library.search_tag("#cat")] == ["another_cat_video_id"]
+    library.allow_video("amazing_cats_video_id")
+    assert [v.video_id for v in library.search_tag("#cat")] == \
+        ["amazing_cats_video_id", "another_cat_video_id"]
+
+
+def test_video_info_lines_are_cached_once_per_catalog():
+    library = VideoLibrary(shared=False)
+    other = VideoLibrary(catalog=library.catalog)
+    video = library.get_video("amazing_cats_video_id")
+    assert library.get_video_info_string(video) == "Amazing Cats (amazing_cats_video_id) [#cat #animal]"
+    library.flag_video("amazing_cats_video_id", "dont_like_cats")
+    assert library.get_video_info_string(video) == \
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal] - FLAGGED (reason: dont_like_cats)"
+    assert other.get_video_info_string(other.get_video("amazing_cats_video_id")) == \
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal]"
+    stats = library.render_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"], stats["size"]) == (2, 1, 0, 1)
+    library.add_video("Amazing Cats 2", "amazing_cats_video_id", ["#cat"])
+    assert library.get_video_info_string(video) == "Amazing Cats 2 (amazing_cats_video_id) [#cat]"
+    assert library.render_cache_stats()["invalidations"] == 1
+
+
+def test_libraries_share_one_catalog_but_not_flags():
+    first, second = VideoLibrary(), VideoLibrary()
+    assert first.catalog is second.catalog
+    first.flag_video("amazing_cats_video_id", "dont_like_cats")
+    assert first.get_video("amazing_cats_video_id").flagged
+    assert not second.get_video("amazing_cats_video_id").flagged
+    assert (first.number_of_allowed_videos(), second.number_of_allowed_videos()) == (4, 5)
+    with pytest.raises(ValueError):
+        first.add_video("Cat Compilation", "cat_compilation_id", ["#cat"])
+
+
+def test_sessions_start_from_global_flags():
+    global_flags = FlagOverlay()
+    session = VideoLibrary(flags=FlagOverlay(global_flags))
+    video = session.get_video("amazing_cats_video_id")
+    assert session.get_video_info_string(video) == "Amazing Cats (amazing_cats_video_id) [#cat #animal]"
+    VideoLibrary(flags=global_flags).flag_video("amazing_cats_video_id", "spam")
+    assert session.get_video_info_string(video) == \
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal] - FLAGGED (reason: spam)"
+    assert session.allow_video("amazing_cats_video_id")
+    assert not video.flagged
+    assert global_flags.flagged(video.ordinal)
+    assert [v.video_id for v in session.search_tag("#cat")] == \
+        ["amazing_cats_video_id", "another_cat_video_id"]
+
+
+def test_title_search_follows_replaced_titles():
+    library = VideoLibrary(shared=False)
+    assert [v.video_id for v in library.search_titles("e at g")] == ["life_at_google_video_id"]
+    library.add_video("Life at Home", "life_at_google_video_id", ["#home"])
+    assert library.search_titles("e at g") == []
+    assert [v.video_id for v in library.search_titles("t hom")] == ["life_at_google_video_id"]
+
+
+def test_random_picks_only_build_the_playable_set_once_most_videos_are_flagged():
+    stats = Stats()
+    library = VideoLibrary(stats=stats)
+    rng = random.Random(3)
+    library.flag_videos([("amazing_cats_video_id", ""), ("funny_dogs_video_id", "")])
+    picks = {library.random_video(rng).video_id for _ in range(100)}
+    assert picks == {"another_cat_video_id", "life_at_google_video_id", "nothing_video_id"}
+    assert "random.playable_rebuilds" not in stats.counters
+    library.flag_video("nothing_video_id")
+    picks = {library.random_video(rng).video_id for _ in range(100)}
+    assert picks == {"another_cat_video_id", "life_at_google_video_id"}
+    assert stats.counters["random.playable_rebuilds"] == 1
+
+
+def test_build_indexes_up_front():
+    catalog = VideoLibrary(shared=False).catalog
+    catalog.build_indexes()
+    assert None not in (catalog._title_index, catalog._trigram_index, catalog._tag_index,
+                        catalog._prefix_index, catalog._listing)
+
+
+def test_tag_expressions_reuse_the_catalog_bitset_until_it_grows():
+    library = VideoLibrary(shared=False)
+    catalog = library.catalog
+    assert [v.video_id for v in library.search_tag("NOT #animal")] == \
+        ["life_at_google_video_id", "nothing_video_id"]
+    assert catalog.all_bits() is catalog.all_bits()
+    library.add_video("Cat Compilation", "cat_compilation_id", ["#cat"])
+    assert catalog.all_bits() == (1 << 6) - 1
+    assert [v.video_id for v in library.search_tag("NOT #animal")] == \
+        ["life_at_google_video_id", "nothing_video_id", "cat_compilation_id"]
@@ -0,0 +1,41 @@
+import io
+
+from src.video_output import BufferedSink, CollectingSink, NullSink
+from src.video_player import VideoPlayer
+
+
+def test_buffered_sink_writes_in_bulk():
+    stream = io.StringIO()
+    sink = BufferedSink(stream, capacity=3)
+    sink.print("one")
+    sink.print("two")
+    assert stream.getvalue() == ""
+    sink.print("three")
+    assert stream.getvalue() == "one\ntwo\nthree\n"
+    sink.print("four")
+    sink.flush()
+    assert stream.getvalue() == "one\ntwo\nthree\nfour\n"
+
+
+def test_player_writes_to_its_sink(capfd):
+    sink = CollectingSink()
+    player = VideoPlayer(output=sink)
+    player.play_video("amazing_cats_video_id")
+    player.flag_video("amazing_cats_video_id")
+    player.flag_video("amazing_cats_video_id")
+    assert sink.take() == [
+        "Playing video: Amazing Cats",
+        "Stopping video: Amazing Cats",
+        "Successfully flagged video: Amazing Cats (reason: Not supplied)",
+        "Cannot flag video: Video is already flagged",
+    ]
+    out, err = capfd.readouterr()
+    assert out == ""
+
+
+def test_null_sink_discards_everything(capfd):
+    player = VideoPlayer(output=NullSink())
+    player.create_playlist("my_playlist")
+    player.show_all_playlists()
+    out, err = capfd.readouterr()
+    assert out == ""
@@ -0,0 +1,27 @@
+from src.video_playlist import Playlist
+
+
+def test_playlist_keeps_insertion_order():
+    playlist = Playlist("my_playlist")
+    for video_id in ["b", "a", "c"]:
+        playlist.add_video(video_id)
+    assert list(playlist.get_videos()) == ["b", "a", "c"]
+    assert "a" in playlist and "d" not in playlist
+    assert playlist.remove_video("a")
+    assert list(playlist) == ["b", "c"]
+    assert len(playlist) == 2
+
+
+def test_playlist_remove_missing_video():
+    playlist = Playlist("my_playlist")
+    assert playlist.remove_video("a") is False
+
+
+def test_playlist_bulk_removal_and_clear():
+    playlist = Playlist("my_playlist")
+    for video_id in ["a", "b", "c", "d"]:
+        playlist.add_video(video_id)
+    assert playlist.remove_videos(["b", "x", "d", "b"]) == {"b", "d"}
+    assert list(playlist) == ["a", "c"]
+    playlist.clear()
+    assert len(playlist) == 0
@@ -0,0 +1,29 @@
+from src.video_stats import LatencyHistogram, Stats
+
+
+def test_quantiles_are_within_a_quarter_of_the_latencies():
+    histogram = LatencyHistogram()
+    for nanoseconds in range(1, 1001):
+        histogram.record(nanoseconds * 1000)
+    for q, exact in ((0.5, 500000), (0.95, 950000), (0.99, 990000)):
+        assert exact <= histogram.quantile(q) <= exact * 1.25
+    assert histogram.quantile(1.0) == histogram.max == 1000000
+    histogram = LatencyHistogram()
+    for nanoseconds in (0, 3, 7):
+        histogram.record(nanoseconds)
+    assert [histogram.quantile(q) for q in (0.3, 0.6, 1.0)] == [0, 3, 7]
+    assert LatencyHistogram().quantile(0.5) == 0
+
+
+def test_snapshot_reports_commands_and_counters():
+    stats = Stats()
+    stats.record_command("PLAY", 2000)
+    stats.record_command("PLAY", 4000, failed=True)
+    stats.count("library.lookups", 3)
+    snapshot = stats.snapshot()
+    play = snapshot["commands"]["PLAY"]
+    assert (play["calls"], play["errors"], play["mean"], play["max"]) == (2, 1, 3e-6, 4e-6)
+    assert play["p50"] <= play["p95"] <= play["p99"] <= play["max"]
+    assert snapshot["counters"] == {"library.lookups": 3}
+    stats.reset()
+    assert stats.snapshot() == {"commands": {}, "counters": {}}
@@ -0,0 +1,20 @@
+from src.video_store import VideoStore
+
+
+def test_store_keeps_videos_by_ordinal():
+    store = VideoStore()
+    ordinal = store.add("Amazing Cats", "amazing_cats_video_id", ["#cat", "#animal"])
+    assert store.ordinal("amazing_cats_video_id") == ordinal
+    assert store.title(ordinal) == "Amazing Cats"
+    assert store.video_id(ordinal) == "amazing_cats_video_id"
+    assert store.tags(ordinal) == ("#cat", "#animal")
+    assert store.ordinal("missing_video_id") is None
+
+
+def test_adding_existing_id_replaces_video():
+    store = VideoStore()
+    store.add("Old", "same_id", ["#old"])
+    assert store.add("Néw títle", "same_id", ["#new", "#newer"]) == 0
+    assert len(store) == 1
+    assert store.title(0) == "Néw títle"
+    assert store.tags(0) == ("#new", "#newer")